@@ -1,6 +1,11 @@
+import cProfile
+import getpass
 import logging
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List, Optional
 from datetime import datetime, UTC
 import pdfplumber
 import json
@@ -8,16 +13,69 @@ import re
 import sys
 import os
 from tqdm import tqdm
+from block_table import BlockTable
+from page_manifest import PageManifest, page_fingerprint
+from text_script import classify_text, classify_words, is_arabic
+
+# عدادات الإحصائيات التي تُجمع من العمليات المتوازية
+COUNTER_KEYS = (
+    'extracted_blocks',
+    'processed_pages',
+    'total_words',
+    'arabic_words',
+    'english_words',
+    'numbers'
+)
+
+# عدد الصفحات الأبطأ في تقرير التوقيت
+PROFILE_TOP_N = 10
+
+try:
+    import resource
+except ImportError:  # غير متاح على Windows
+    resource = None
+
+
+def parse_page_range(spec: Optional[str], total_pages: int) -> List[int]:
+    """تحويل نطاق صفحات مثل "1-20,25,40-" إلى أرقام صفحات (تبدأ من 0) بالترتيب
+
+    الترقيم في النطاق يبدأ من 1، والنطاق المفتوح ("40-") يمتد حتى آخر صفحة.
+    بدون نطاق تُعاد كل الصفحات.
+    """
+    if not spec:
+        return list(range(total_pages))
+
+    pages = set()
+    for part in str(spec).split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start, sep, end = part.partition('-')
+        first = int(start) if start.strip() else 1
+        last = (int(end) if end.strip() else total_pages) if sep else first
+        if first < 1 or last < first:
+            raise ValueError(f"نطاق صفحات غير صالح: {part}")
+        pages.update(range(first - 1, min(last, total_pages)))
+
+    return sorted(pages)
+
 
 class PDFTextParser:
     def __init__(self, input_file: str, config: Dict):
         self.input_file = Path(input_file)
         self.config = config
         self.pdf = None
+        self.timestamp = datetime.now(UTC).strftime("%Y%m%d_%H%M%S")
+        self.text_file = Path(config['output_dir']) / f"{self.input_file.stem}_text_{self.timestamp}.txt"
+        self.text_output = None
+        # توقيت كل صفحة: استخراج النص، استخراج الكلمات، التصنيف
+        self.page_profiles = []
         self.stats = {
             'start_time': datetime.now(UTC).isoformat(),
             'end_time': None,
             'total_pages': 0,
+            'selected_pages': 0,
+            'reused_pages': 0,
             'extracted_blocks': 0,
             'processed_pages': 0,
             'total_words': 0,
@@ -34,7 +92,7 @@ class PDFTextParser:
                 'python_version': sys.version,
                 'os_name': os.name,
                 'platform': sys.platform,
-                'username': os.getlogin(),
+                'username': getpass.getuser(),
                 'hostname': os.uname().nodename if hasattr(os, 'uname') else 'unknown'
             }
         })
@@ -89,59 +147,208 @@ class PDFTextParser:
 
     def _analyze_text(self, text: str) -> str:
         """تحليل نوع النص"""
-        if self._is_arabic_text(text):
-            return 'arabic'
-        elif text.isascii() and text.replace(' ', '').isalpha():
-            return 'english'
-        elif text.replace('.', '').isdigit():
-            return 'number'
-        return 'mixed'
+        return classify_text(text)
 
     def _is_arabic_text(self, text: str) -> bool:
         """التحقق من النص العربي"""
-        arabic_ranges = [
-            (0x0600, 0x06FF),  # Arabic
-            (0x0750, 0x077F),  # Arabic Supplement
-            (0x08A0, 0x08FF),  # Arabic Extended-A
-            (0xFB50, 0xFDFF),  # Arabic Presentation Forms-A
-            (0xFE70, 0xFEFF),  # Arabic Presentation Forms-B
-        ]
-        
-        for char in text:
-            code = ord(char)
-            for start, end in arabic_ranges:
-                if start <= code <= end:
-                    return True
-        return False
+        return is_arabic(text)
 
     def process(self) -> List[Dict]:
         """معالجة الملف مع تتبع التقدم"""
-        blocks = []
+        try:
+            return list(self.iter_blocks())
+        except Exception:
+            # تم تسجيل الخطأ في iter_pages
+            return []
+
+    def process_table(self) -> BlockTable:
+        """معالجة الملف وتخزين الكلمات في جدول عمودي مضغوط بدلاً من قائمة قواميس"""
+        table = BlockTable()
+        try:
+            for page_result in self.iter_pages():
+                table.extend(page_result['blocks'])
+        except Exception:
+            # تم تسجيل الخطأ في iter_pages
+            pass
+        return table
+
+    def iter_pages(self) -> Iterator[Dict]:
+        """توليد نتائج الصفحات بالترتيب صفحةً بصفحة
+
+        كل نتيجة: {'page': رقم الصفحة, 'text': نص الصفحة, 'blocks': كتل الكلمات}.
+        الذاكرة المستخدمة لا تعتمد على حجم الملف، ويُكتب نص كل صفحة إلى
+        ملف النص المستخرج فور وصولها.
+        """
         start_time = datetime.now(UTC)
+        profiler = cProfile.Profile() if self.config.get('cprofile') else None
         
         try:
+            if profiler:
+                # مع workers > 1 يغطي الملف العملية الرئيسية فقط
+                profiler.enable()
+
+            # كتابة نص كل صفحة فور استخراجه بدلاً من إعادة الاستخراج عند الحفظ
+            self.text_output = open(self.text_file, 'w', encoding='utf-8')
+
             print("\nبدء معالجة الصفحات...")
-            for page_num in tqdm(range(self.stats['total_pages']), desc="معالجة الصفحات"):
-                page_blocks = self._process_page(self.pdf.pages[page_num], page_num)
-                if page_blocks:
-                    blocks.extend(page_blocks)
-                    self.stats['extracted_blocks'] += len(page_blocks)
-                self.stats['processed_pages'] += 1
+            page_nums = parse_page_range(self.config.get('pages'), self.stats['total_pages'])
+            self.stats['selected_pages'] = len(page_nums)
+
+            for page_result in self._iter_selected(page_nums):
+                self._write_page_text(page_result)
+                yield page_result
             
             self.stats['processing_time'] = (datetime.now(UTC) - start_time).total_seconds()
-            return blocks
             
         except Exception as e:
             self._log_error("خطأ في معالجة الملف", e)
-            return []
+            raise
         finally:
+            if profiler:
+                profiler.disable()
+                self._save_cprofile(profiler)
             self._cleanup()
 
-    def _process_page(self, page, page_num: int) -> List[Dict]:
+    def iter_blocks(self) -> Iterator[Dict]:
+        """توليد كتل الكلمات واحدة تلو الأخرى بدلاً من تجميعها في قائمة"""
+        for page_result in self.iter_pages():
+            yield from page_result['blocks']
+
+    def _iter_selected(self, page_nums: List[int]) -> Iterator[Dict]:
+        """استخراج الصفحات المحددة، مع إعادة استخدام الصفحات التي لم تتغير في الوضع التزايدي"""
+        manifest = None
+        fingerprints = {}
+        extract_nums = page_nums
+
+        if self.config.get('incremental'):
+            # البصمة تُحسب من تدفق محتوى الصفحة فقط، وهي أسرع بكثير من الاستخراج
+            manifest = PageManifest(self.config.get('cache_dir', self.config['output_dir']), self.input_file.stem)
+            fingerprints = {page_num: self._fingerprint_page(self.pdf.pages[page_num]) for page_num in page_nums}
+            extract_nums = [
+                page_num for page_num in page_nums
+                if not manifest.is_current(page_num + 1, fingerprints[page_num])
+            ]
+            logging.info(f"الصفحات المتغيرة: {len(extract_nums)} من {len(page_nums)}")
+
+        workers = self.config.get('workers', 1)
+        if workers > 1 and extract_nums:
+            extracted = self._iter_parallel(workers, extract_nums)
+        else:
+            extracted = self._iter_sequential(extract_nums)
+
+        pending = set(extract_nums)
+        try:
+            for page_num in page_nums:
+                if page_num in pending:
+                    page_result = next(extracted)
+                else:
+                    page_result = manifest.load(page_num + 1)
+                    if page_result is not None:
+                        self._reuse_page(page_result)
+                        yield page_result
+                        continue
+                    # ملف الصفحة المحفوظ مفقود أو تالف
+                    page_result = self._extract_page(self.pdf, page_num)
+                    self._count_page(page_result)
+
+                if manifest:
+                    manifest.store(page_result, fingerprints[page_num])
+                yield page_result
+        finally:
+            # لا يُستنفد المولد بعد آخر صفحة، فيُغلق صراحة لإغلاق شريط التقدم والعمليات
+            extracted.close()
+            if manifest:
+                manifest.save(self.stats['total_pages'])
+
+    def _reuse_page(self, page_result: Dict):
+        """احتساب صفحة محفوظة من تشغيل سابق في الإحصائيات"""
+        self._update_stats_counts(Counter(block['text_type'] for block in page_result['blocks']))
+        self._count_page(page_result)
+        self.stats['reused_pages'] += 1
+
+    def _count_page(self, page_result: Dict):
+        self.stats['extracted_blocks'] += len(page_result['blocks'])
+        self.stats['processed_pages'] += 1
+
+    def _iter_sequential(self, page_nums: List[int]) -> Iterator[Dict]:
+        """معالجة الصفحات في العملية الحالية مع شريط تقدم"""
+        progress = tqdm(total=len(page_nums), desc="معالجة الصفحات")
+        try:
+            for page_result in self._iter_pages(self.pdf, page_nums):
+                progress.update(1)
+                yield page_result
+        finally:
+            progress.close()
+
+    def _iter_pages(self, pdf, page_nums) -> Iterator[Dict]:
+        """معالجة مجموعة صفحات من ملف pdfplumber مفتوح"""
+        for page_num in page_nums:
+            page_result = self._extract_page(pdf, page_num)
+            self._count_page(page_result)
+            yield page_result
+
+    def _extract_page(self, pdf, page_num: int) -> Dict:
+        """معالجة صفحة ثم تفريغ ما خزّنه pdfplumber منها (الأحرف والتخطيط)
+
+        دون ذلك تبقى كائنات كل صفحة معالجة في الذاكرة حتى إغلاق الملف.
+        """
+        page = pdf.pages[page_num]
+        try:
+            return self._process_page(page, page_num)
+        finally:
+            page.close()
+
+    @staticmethod
+    def _fingerprint_page(page) -> str:
+        """بصمة الصفحة مع تفريغ ذاكرتها المؤقتة بعد قراءة تدفقات المحتوى"""
+        try:
+            return page_fingerprint(page)
+        finally:
+            page.close()
+
+    def _iter_parallel(self, workers: int, page_nums: List[int]) -> Iterator[Dict]:
+        """توزيع مجموعات الصفحات على عدة عمليات مع الحفاظ على ترتيب الصفحات"""
+        total_pages = len(page_nums)
+        # عدد النطاقات أكبر من عدد العمليات لتوزيع الحمل عند اختلاف تكلفة الصفحات
+        shard_size = max(1, -(-total_pages // (workers * 4)))
+        shards = [page_nums[start:start + shard_size] for start in range(0, total_pages, shard_size)]
+
+        progress = tqdm(total=len(shards), desc="معالجة الصفحات")
+        futures = deque()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            try:
+                # عدد محدود من النطاقات قيد المعالجة حتى لا تتراكم النتائج في الذاكرة
+                for shard in shards:
+                    futures.append(executor.submit(_process_page_range, str(self.input_file), shard))
+                    if len(futures) >= workers * 2:
+                        yield from self._collect_shard(futures.popleft().result(), progress)
+
+                while futures:
+                    yield from self._collect_shard(futures.popleft().result(), progress)
+            finally:
+                for future in futures:
+                    future.cancel()
+                progress.close()
+
+    def _collect_shard(self, result: Dict, progress) -> List[Dict]:
+        """دمج إحصائيات عملية فرعية وإرجاع صفحاتها"""
+        for key in COUNTER_KEYS:
+            self.stats[key] += result['stats'][key]
+        self.stats['errors'].extend(result['stats']['errors'])
+        self.page_profiles.extend(result['profiles'])
+        progress.update(1)
+        return result['pages']
+
+    def _process_page(self, page, page_num: int) -> Dict:
         """معالجة صفحة واحدة"""
+        page_text = None
+        blocks = []
+        profile = {'page': page_num + 1}
+        start = time.perf_counter()
         try:
-            # استخراج النص كاملاً
+            # استخراج النص كاملاً (يشمل تحليل محتوى الصفحة عند أول وصول إليها)
             page_text = page.extract_text()
+            profile['extract_text'] = time.perf_counter() - start
             if page_text:
                 print(f"\nصفحة {page_num + 1}:")
                 print("-" * 50)
@@ -149,51 +356,68 @@ class PDFTextParser:
                 print("-" * 50)
             
             # استخراج الكلمات
+            step = time.perf_counter()
             words = page.extract_words(
                 keep_blank_chars=True,
                 x_tolerance=3,
                 y_tolerance=3,
                 use_text_flow=True
             )
+            profile['extract_words'] = time.perf_counter() - step
             
-            blocks = []
-            for word in words:
-                if word['text'].strip():
-                    text = word['text']
-                    text_type = self._analyze_text(text)
-                    
-                    block = {
-                        'text': text,
-                        'page': page_num + 1,
-                        'bbox': (word['x0'], word['top'], word['x1'], word['bottom']),
-                        'line_num': word.get('line_num', 0),
-                        'text_type': text_type
-                    }
-                    
-                    self._update_stats(text_type)
-                    blocks.append(block)
+            # تصنيف جميع كلمات الصفحة دفعة واحدة
+            step = time.perf_counter()
+            words = [word for word in words if word['text'].strip()]
+            text_types, counts = classify_words([word['text'] for word in words])
             
-            return blocks
+            for word, text_type in zip(words, text_types):
+                block = {
+                    'text': word['text'],
+                    'page': page_num + 1,
+                    'bbox': (word['x0'], word['top'], word['x1'], word['bottom']),
+                    'line_num': word.get('line_num', 0),
+                    'text_type': text_type
+                }
+                blocks.append(block)
+            
+            self._update_stats_counts(counts)
+            profile['classify'] = time.perf_counter() - step
             
         except Exception as e:
             self._log_error(f"خطأ في معالجة الصفحة {page_num + 1}", e)
-            return []
+            blocks = []
+
+        profile['total'] = time.perf_counter() - start
+        profile['words'] = len(blocks)
+        profile['chars'] = len(page_text or '')
+        self.page_profiles.append(profile)
 
-    def _update_stats(self, text_type: str):
-        """تحديث الإحصائيات"""
-        self.stats['total_words'] += 1
-        if text_type == 'arabic':
-            self.stats['arabic_words'] += 1
-        elif text_type == 'english':
-            self.stats['english_words'] += 1
-        elif text_type == 'number':
-            self.stats['numbers'] += 1
+        return {'page': page_num + 1, 'text': page_text, 'blocks': blocks}
+
+    def _write_page_text(self, page_result: Dict):
+        """كتابة نص الصفحة إلى ملف النص المستخرج"""
+        if not page_result['text']:
+            return
+
+        self.text_output.write(f"\n=== الصفحة {page_result['page']} ===\n")
+        self.text_output.write(page_result['text'])
+        self.text_output.write("\n" + "=" * 50 + "\n")
+
+    def _update_stats_counts(self, counts: Dict[str, int]):
+        """تحديث الإحصائيات بعدد كل نوع في الصفحة"""
+        self.stats['total_words'] += sum(counts.values())
+        self.stats['arabic_words'] += counts.get('arabic', 0)
+        self.stats['english_words'] += counts.get('english', 0)
+        self.stats['numbers'] += counts.get('number', 0)
 
     def _cleanup(self):
         """تنظيف الموارد"""
         try:
             if self.pdf:
                 self.pdf.close()
+            if self.text_output:
+                self.text_output.close()
+                self.text_output = None
             
             self.stats['end_time'] = datetime.now(UTC).isoformat()
             self._save_results()
@@ -205,30 +429,29 @@ class PDFTextParser:
         """حفظ النتائج"""
         try:
             output_dir = Path(self.config['output_dir'])
-            timestamp = datetime.now(UTC).strftime("%Y%m%d_%H%M%S")
             
+            # حفظ تقرير التوقيت لكل صفحة، وملخصه ضمن الإحصائيات
+            profile = self._profile_summary()
+            self.stats['profile'] = {key: value for key, value in profile.items() if key != 'pages'}
+            profile_file = output_dir / f"{self.input_file.stem}_profile_{self.timestamp}.json"
+            with open(profile_file, 'w', encoding='utf-8') as f:
+                json.dump(profile, f, ensure_ascii=False, indent=2)
+
             # حفظ الإحصائيات
-            stats_file = output_dir / f"{self.input_file.stem}_stats_{timestamp}.json"
+            stats_file = output_dir / f"{self.input_file.stem}_stats_{self.timestamp}.json"
             with open(stats_file, 'w', encoding='utf-8') as f:
                 json.dump(self.stats, f, ensure_ascii=False, indent=2)
             
-            # حفظ النص المستخرج
-            text_file = output_dir / f"{self.input_file.stem}_text_{timestamp}.txt"
-            with open(text_file, 'w', encoding='utf-8') as f:
-                for page_num in range(self.stats['total_pages']):
-                    text = self.pdf.pages[page_num].extract_text()
-                    if text:
-                        f.write(f"\n=== الصفحة {page_num + 1} ===\n")
-                        f.write(text)
-                        f.write("\n" + "=" * 50 + "\n")
-            
+            # النص المستخرج كُتب صفحةً بصفحة أثناء المعالجة
             print(f"\nتم حفظ النتائج في المجلد: {output_dir}")
             print(f"- الإحصائيات: {stats_file.name}")
-            print(f"- النص المستخرج: {text_file.name}")
+            print(f"- توقيت الصفحات: {profile_file.name}")
+            print(f"- النص المستخرج: {self.text_file.name}")
             
             logging.info(f"""
 === نتائج المعالجة ===
 عدد الصفحات: {self.stats['total_pages']}
+الصفحات المعالجة: {self.stats['processed_pages']} (المعاد استخدامها: {self.stats['reused_pages']})
 الكتل المستخرجة: {self.stats['extracted_blocks']}
 الكلمات العربية: {self.stats['arabic_words']}
 الكلمات الإنجليزية: {self.stats['english_words']}
@@ -239,6 +462,49 @@ class PDFTextParser:
         except Exception as e:
             self._log_error("خطأ في حفظ النتائج", e)
 
+    def _profile_summary(self) -> Dict:
+        """ملخص توقيت الصفحات: مجموع كل مرحلة، الصفحات الأبطأ، الكلمات في الثانية، ذروة الذاكرة"""
+        pages = sorted(self.page_profiles, key=lambda profile: profile['page'])
+        stages = ('extract_text', 'extract_words', 'classify', 'total')
+        totals = {stage: round(sum(profile.get(stage, 0) for profile in pages), 4) for stage in stages}
+        words = sum(profile['words'] for profile in pages)
+        top_n = self.config.get('profile_top_n', PROFILE_TOP_N)
+
+        return {
+            'stage_seconds': totals,
+            'words_per_second': round(words / totals['total'], 1) if totals['total'] else 0,
+            'slowest_pages': [
+                {**profile, 'words_per_second': round(profile['words'] / profile['total'], 1) if profile['total'] else 0}
+                for profile in sorted(pages, key=lambda profile: profile['total'], reverse=True)[:top_n]
+            ],
+            # صفحات بلا نص مستخرج غالباً صور ممسوحة ضوئياً تحتاج إلى معالجة مختلفة (OCR)
+            'pages_without_text': [profile['page'] for profile in pages if not profile['chars']],
+            'peak_rss_mb': self._peak_rss_mb(),
+            'pages': pages
+        }
+
+    @staticmethod
+    def _peak_rss_mb() -> Dict:
+        """ذروة الذاكرة المقيمة للعملية الرئيسية والعمليات الفرعية (بالميجابايت)"""
+        if resource is None:
+            return {}
+
+        # ru_maxrss بالكيلوبايت على Linux وبالبايت على macOS
+        unit = 1024 * 1024 if sys.platform == 'darwin' else 1024
+        return {
+            'self': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit, 1),
+            'workers': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit, 1)
+        }
+
+    def _save_cprofile(self, profiler: cProfile.Profile):
+        """حفظ نتائج cProfile لفتحها لاحقاً بـ pstats أو snakeviz"""
+        try:
+            profile_file = Path(self.config['output_dir']) / f"{self.input_file.stem}_cprofile_{self.timestamp}.prof"
+            profiler.dump_stats(str(profile_file))
+            print(f"- ملف cProfile: {profile_file.name}")
+        except Exception as e:
+            self._log_error("خطأ في حفظ ملف cProfile", e)
+
     def _log_error(self, message: str, error: Exception):
         """تسجيل الأخطاء"""
         error_info = {
@@ -251,13 +517,26 @@ class PDFTextParser:
         logging.error(f"{message}: {str(error)}", exc_info=True)
 
 
+def _process_page_range(input_file: str, page_nums: List[int]) -> Dict:
+    """معالجة مجموعة صفحات داخل عملية فرعية بمقبض pdfplumber خاص بها"""
+    parser = PDFTextParser.__new__(PDFTextParser)
+    parser.stats = {key: 0 for key in COUNTER_KEYS}
+    parser.stats['errors'] = []
+    parser.page_profiles = []
+
+    with pdfplumber.open(input_file) as pdf:
+        pages = list(parser._iter_pages(pdf, page_nums))
+
+    return {'pages': pages, 'stats': parser.stats, 'profiles': parser.page_profiles}
+
+
 def main():
     try:
         # طباعة معلومات البداية
         current_time = datetime.now(UTC)
         print(f"=== معالج PDF ===")
         print(f"التاريخ والوقت (UTC): {current_time.strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"المستخدم: {os.getlogin()}")
+        print(f"المستخدم: {getpass.getuser()}")
         print(f"نظام التشغيل: {sys.platform}")
         print(f"إصدار Python: {sys.version.split()[0]}")
         print("=" * 40)
@@ -272,7 +551,12 @@ def main():
         
         config = {
             'output_dir': str(base_dir / 'output'),
-            'cache_dir': str(base_dir / 'cache')
+            'cache_dir': str(base_dir / 'cache'),
+            'workers': os.cpu_count() or 1,
+            'profile_top_n': PROFILE_TOP_N,
+            'cprofile': False,  # True لحفظ ملف cProfile للعملية الرئيسية
+            'pages': None,  # نطاق الصفحات مثل "1-20,25" (None لكل الصفحات)
+            'incremental': True  # إعادة استخراج الصفحات التي تغيرت بصمتها فقط (البيان في cache_dir)
         }
         
         # إنشاء المجلدات المطلوبة
@@ -282,12 +566,15 @@ def main():
         print(f"معالجة الملف: {input_file}")
         print("=" * 40)
         
-        # معالجة الملف
+        # معالجة الملف وتخزين الكلمات في جدول عمودي مضغوط
         parser = PDFTextParser(str(input_file), config)
-        blocks = parser.process()
+        table = parser.process_table()
+        blocks_file = Path(config['output_dir']) / f"{input_file.stem}_blocks_{parser.timestamp}.bin"
+        table.save(str(blocks_file))
         
         print("\nملخص النتائج:")
-        print(f"- تم استخراج {len(blocks)} كتلة نصية")
+        print(f"- تم استخراج {len(table)} كتلة نصية")
+        print(f"- جدول الكتل: {blocks_file.name}")
         print(f"- راجع المجلد {config['output_dir']} للحصول على النتائج الكاملة")
         
     except Exception as e:
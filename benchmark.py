@@ -0,0 +1,248 @@
+"""قياس أداء استخراج PDF وخط الترجمة باستخدام ملفات المستودع
+
+الحالات:
+- pdf_extract_<N>p: PDFTextParser على ملفات PDF مولدة بعدد صفحات مختلف
+- text_block_<fixture>: process_text_block على ملفات النص مع مترجم محلي (stub)
+- process_file_<fixture>: process_file كاملاً مع مترجم محلي وبدون ذاكرة مؤقتة أو تقريبية
+
+الاستخدام:
+    python benchmark.py                     # تشغيل ومقارنة بخط الأساس إن وجد
+    python benchmark.py --save-baseline     # حفظ النتائج كخط أساس جديد
+    python benchmark.py --only text_block   # تشغيل الحالات التي تبدأ بالاسم فقط
+"""
+import argparse
+import contextlib
+import gc
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+REPO_DIR = Path(__file__).resolve().parent
+BASELINE_FILE = REPO_DIR / 'benchmarks' / 'baseline.json'
+TEXT_FIXTURES = ('document.txt', 'test1.txt', '1test.txt', 'translated_document_ar.txt')
+PDF_SIZES = (10, 50)
+# نسبة التباطؤ المسموحة قبل اعتبار النتيجة تراجعاً
+TOLERANCE = 0.25
+
+
+def make_pdf(path: Path, pages: int, source_text: str, lines_per_page: int = 40):
+    """كتابة ملف PDF بسيط (Helvetica) مباشرة دون مكتبات خارجية"""
+    words = source_text.split() or ['lorem', 'ipsum']
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # كائن الصفحات يُكتب بعد معرفة أرقام الصفحات
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+    ]
+    page_ids = []
+    position = 0
+
+    for _ in range(pages):
+        lines = []
+        for _ in range(lines_per_page):
+            line = ' '.join(words[(position + i) % len(words)] for i in range(10))
+            position += 10
+            line = line.encode('latin-1', 'replace').decode('latin-1')
+            lines.append(line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)'))
+
+        stream = "BT /F1 10 Tf 14 TL 40 800 Td\n" + "\n".join(f"({line}) Tj T*" for line in lines) + "\nET"
+        stream = stream.encode('latin-1')
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+
+    with open(path, 'wb') as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, 1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+
+def measure(run: Callable[[], Dict], repeat: int) -> Dict:
+    """أفضل زمن من عدة تكرارات، ثم تشغيل إضافي مع tracemalloc لقياس ذروة الذاكرة"""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        sizes = run()
+        times.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    best = min(times)
+    result = {
+        'seconds': round(best, 4),
+        'peak_memory_mb': round(peak / (1024 * 1024), 2)
+    }
+    for unit in ('pages', 'chars'):
+        if sizes.get(unit):
+            result[f'{unit}_per_second'] = round(sizes[unit] / best, 1)
+    return result
+
+
+@contextlib.contextmanager
+def quiet(workdir: Path):
+    """إسكات الطباعة والتسجيل وتشغيل الحالة داخل مجلد مؤقت (لملفات السجلات)"""
+    previous_dir = os.getcwd()
+    with open(os.devnull, 'w', encoding='utf-8') as devnull:
+        os.chdir(workdir)
+        logging.disable(logging.CRITICAL)
+        try:
+            with contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+                yield
+        finally:
+            logging.disable(logging.NOTSET)
+            os.chdir(previous_dir)
+
+
+def pdf_cases(workdir: Path, sizes) -> Dict[str, Callable[[], Dict]]:
+    from PDFText_Parser import PDFTextParser
+
+    source_text = (REPO_DIR / 'document.txt').read_text(encoding='utf-8')
+    cases = {}
+    for pages in sizes:
+        pdf_path = workdir / f'bench_{pages}p.pdf'
+        make_pdf(pdf_path, pages, source_text)
+
+        def run(pdf_path=pdf_path):
+            config = {'output_dir': str(workdir / 'pdf_output'), 'workers': 1}
+            parser = PDFTextParser(str(pdf_path), config)
+            table = parser.process_table()
+            return {'pages': parser.stats['processed_pages'], 'chars': len(table.text_buffer)}
+
+        cases[f'pdf_extract_{pages}p'] = run
+    return cases
+
+
+def translation_cases(workdir: Path) -> Dict[str, Callable[[], Dict]]:
+    from googletran import ChessTextProcessor
+
+    config = {'backend': 'stub', 'cache_file': None, 'memory_file': None}
+    cases = {}
+    for fixture in TEXT_FIXTURES:
+        source = REPO_DIR / fixture
+        if not source.exists():
+            continue
+        text = source.read_text(encoding='utf-8')
+        name = source.stem.replace(' ', '_')
+
+        def run_block(text=text):
+            ChessTextProcessor(config).process_text_block(text)
+            return {'chars': len(text)}
+
+        def run_file(source=source, text=text):
+            input_file = workdir / source.name
+            shutil.copy(source, input_file)
+            processor = ChessTextProcessor(config)
+            output_file = processor.process_file(str(input_file))
+            pages = processor.metrics.counters['pages']
+            for path in (output_file, f'{output_file}.metrics.json', processor.checkpoint_path(str(input_file))):
+                if os.path.exists(path):
+                    os.remove(path)
+            return {'pages': pages, 'chars': len(text)}
+
+        cases[f'text_block_{name}'] = run_block
+        cases[f'process_file_{name}'] = run_file
+    return cases
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """الحالات التي أصبحت أبطأ من خط الأساس بأكثر من النسبة المسموحة"""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline or 'seconds' not in result:
+            continue
+        ratio = result['seconds'] / baseline[name]['seconds'] if baseline[name]['seconds'] else 1
+        result['vs_baseline'] = round(ratio, 3)
+        if ratio > 1 + tolerance:
+            regressions.append(f"{name}: {ratio:.2f}x أبطأ من خط الأساس")
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="قياس أداء استخراج PDF وخط الترجمة")
+    parser.add_argument('--repeat', type=int, default=3, help="عدد التكرارات لكل حالة (يُؤخذ الأفضل)")
+    parser.add_argument('--pdf-pages', type=int, nargs='+', default=list(PDF_SIZES), help="أحجام ملفات PDF المولدة")
+    parser.add_argument('--only', help="تشغيل الحالات التي تبدأ بهذا الاسم فقط")
+    parser.add_argument('--baseline', default=str(BASELINE_FILE), help="ملف خط الأساس")
+    parser.add_argument('--save-baseline', action='store_true', help="حفظ النتائج كخط أساس جديد")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help="نسبة التباطؤ المسموحة")
+    parser.add_argument('--output', help="حفظ النتائج في ملف JSON")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    sys.path.insert(0, str(REPO_DIR))
+    workdir = Path(tempfile.mkdtemp(prefix='asos_bench_'))
+
+    try:
+        cases = {}
+        for name, factory in (('pdf', lambda: pdf_cases(workdir, args.pdf_pages)),
+                              ('translation', lambda: translation_cases(workdir))):
+            try:
+                cases.update(factory())
+            except ImportError as e:
+                print(f"⚠️ تم تخطي حالات {name}: مكتبة غير مثبتة ({e})")
+
+        results = {}
+        for name, run in cases.items():
+            if args.only and not name.startswith(args.only):
+                continue
+            try:
+                with quiet(workdir):
+                    results[name] = measure(run, args.repeat)
+            except Exception as e:
+                results[name] = {'error': f"{type(e).__name__}: {e}"}
+            print(f"{name:40} {json.dumps(results[name], ensure_ascii=False)}")
+
+        regressions = []
+        baseline_path = Path(args.baseline)
+        if args.save_baseline:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding='utf-8')
+            print(f"\n✅ تم حفظ خط الأساس: {baseline_path}")
+        elif baseline_path.exists():
+            baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+            regressions = compare(results, baseline, args.tolerance)
+
+        if args.output:
+            Path(args.output).write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding='utf-8')
+
+        if regressions:
+            print("\n❌ تراجع في الأداء:")
+            for line in regressions:
+                print(f"- {line}")
+            sys.exit(1)
+
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
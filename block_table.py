@@ -0,0 +1,146 @@
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Iterator, List
+
+# ترميز أنواع النص في عمود text_type
+TEXT_TYPES = ('arabic', 'english', 'number', 'mixed')
+TEXT_TYPE_CODES = {name: code for code, name in enumerate(TEXT_TYPES)}
+
+MAGIC = b'BLKT'
+VERSION = 1
+
+
+class BlockTable:
+    """تخزين عمودي مضغوط لكتل الكلمات المستخرجة من PDF
+
+    بدلاً من قاموس لكل كلمة (~500 بايت) تُخزن كل خاصية في مصفوفة مستقلة:
+    الإحداثيات float32، الصفحة ورقم السطر uint32، نوع النص uint8، والنصوص
+    في مخزن UTF-8 واحد مع مواضع البداية (~40 بايت للكلمة).
+    """
+
+    # أعمدة الأرقام بترتيب الحفظ
+    COLUMNS = (
+        ('x0', 'f'),
+        ('top', 'f'),
+        ('x1', 'f'),
+        ('bottom', 'f'),
+        ('page', 'I'),
+        ('line_num', 'I'),
+        ('text_type', 'B'),
+        ('text_offsets', 'I')
+    )
+
+    def __init__(self):
+        for name, typecode in self.COLUMNS:
+            setattr(self, name, array(typecode))
+        self.text_offsets.append(0)
+        self.text_buffer = bytearray()
+
+    def __len__(self) -> int:
+        return len(self.page)
+
+    def append(self, block: Dict):
+        """إضافة كتلة بصيغة القاموس التي ينتجها PDFTextParser"""
+        x0, top, x1, bottom = block['bbox']
+        self.x0.append(x0)
+        self.top.append(top)
+        self.x1.append(x1)
+        self.bottom.append(bottom)
+        self.page.append(block['page'])
+        self.line_num.append(block['line_num'])
+        self.text_type.append(TEXT_TYPE_CODES[block['text_type']])
+        self.text_buffer += block['text'].encode('utf-8')
+        self.text_offsets.append(len(self.text_buffer))
+
+    def extend(self, blocks: Iterable[Dict]):
+        for block in blocks:
+            self.append(block)
+
+    def text(self, row: int) -> str:
+        """نص الكلمة في الصف المحدد"""
+        return self.text_buffer[self.text_offsets[row]:self.text_offsets[row + 1]].decode('utf-8')
+
+    def __getitem__(self, row: int) -> Dict:
+        """إعادة بناء الكتلة بصيغة القاموس (للتوافق مع الكود القائم)"""
+        if row < 0:
+            row += len(self)
+        return {
+            'text': self.text(row),
+            'page': self.page[row],
+            'bbox': (self.x0[row], self.top[row], self.x1[row], self.bottom[row]),
+            'line_num': self.line_num[row],
+            'text_type': TEXT_TYPES[self.text_type[row]]
+        }
+
+    def __iter__(self) -> Iterator[Dict]:
+        for row in range(len(self)):
+            yield self[row]
+
+    def page_rows(self, page: int) -> range:
+        """صفوف صفحة معينة (الصفحات مخزنة بالترتيب، لذا البحث ثنائي)"""
+        return range(bisect_left(self.page, page), bisect_right(self.page, page))
+
+    def rows_of_type(self, text_type: str) -> List[int]:
+        """صفوف نوع نص معين"""
+        code = TEXT_TYPE_CODES[text_type]
+        try:
+            import numpy as np
+        except ImportError:
+            return [row for row, value in enumerate(self.text_type) if value == code]
+        return np.flatnonzero(self.as_numpy()['text_type'] == code).tolist()
+
+    def as_numpy(self) -> Dict:
+        """عرض الأعمدة كمصفوفات NumPy دون نسخ (يتطلب numpy)"""
+        import numpy as np
+
+        return {
+            name: np.frombuffer(getattr(self, name), dtype=getattr(self, name).typecode)
+            for name, _ in self.COLUMNS
+        }
+
+    def nbytes(self) -> int:
+        """الحجم التقريبي للبيانات في الذاكرة"""
+        columns = sum(len(getattr(self, name)) * getattr(self, name).itemsize for name, _ in self.COLUMNS)
+        return columns + len(self.text_buffer)
+
+    def save(self, path: str):
+        """حفظ الجدول في ملف ثنائي"""
+        with open(path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<HQ', VERSION, len(self)))
+            for name, _ in self.COLUMNS:
+                column = getattr(self, name)
+                if sys.byteorder == 'big':
+                    column = array(column.typecode, column)
+                    column.byteswap()
+                data = column.tobytes()
+                f.write(struct.pack('<Q', len(data)))
+                f.write(data)
+            f.write(struct.pack('<Q', len(self.text_buffer)))
+            f.write(self.text_buffer)
+
+    @classmethod
+    def load(cls, path: str) -> 'BlockTable':
+        """تحميل جدول محفوظ بواسطة save"""
+        table = cls()
+        with open(path, 'rb') as f:
+            if f.read(4) != MAGIC:
+                raise ValueError(f"ليس ملف جدول كتل: {path}")
+            version, _ = struct.unpack('<HQ', f.read(10))
+            if version != VERSION:
+                raise ValueError(f"إصدار غير مدعوم لجدول الكتل: {version}")
+
+            for name, typecode in cls.COLUMNS:
+                size, = struct.unpack('<Q', f.read(8))
+                column = array(typecode)
+                column.frombytes(f.read(size))
+                if sys.byteorder == 'big':
+                    column.byteswap()
+                setattr(table, name, column)
+
+            size, = struct.unpack('<Q', f.read(8))
+            table.text_buffer = bytearray(f.read(size))
+
+        return table
@@ -1,8 +1,13 @@
 import sys
 import os
+import argparse
+import asyncio
+import contextlib
+import copy
 import logging
 import subprocess
 import platform
+import threading
 import psutil
 from datetime import datetime
 import socket
@@ -17,7 +22,18 @@ import arabic_reshaper
 from bidi.algorithm import get_display  # استخدام bidi بدلاً من python-bidi
 import re
 import json
-from deep_translator import GoogleTranslator
+from collections import Counter, deque
+from translation_backends import BACKENDS, GoogleBackend, NetworkSetupError, RateLimitError, create_backend
+from translation_batching import chunk_text, join_batch, pack_segments, split_batch, split_paragraphs
+from translation_cache import TranslationCache
+from translation_checkpoint import TranslationCheckpoint
+from translation_glossary import Glossary
+from translation_http import shared_pool
+from translation_memory import TranslationMemory
+from translation_metrics import PipelineMetrics
+from translation_pages import iter_pages
+from translation_pipeline import RATE_LIMIT_BACKOFF, AdaptivePacer, AsyncTranslationEngine
+from text_script import has_language_letters
 
 # تعريف المتغيرات العامة
 CURRENT_USER = os.getenv('USER', 'unknown')
@@ -28,7 +44,35 @@ MAX_RETRIES = 3
 DELAY_MIN = 2
 DELAY_MAX = 5
 CHUNK_SIZE = 1000
+REFLOW_LINES = True  # دمج أسطر PDF الملتفة في فقرات قبل التقسيم
+DEDUP_SEGMENTS = True  # مرور أولي على الملف لترجمة الفقرات المتكررة مرة واحدة
+PREFILTER_SEGMENTS = True  # تمرير المقاطع بلا نص قابل للترجمة (فواصل، أرقام، نص عربي) دون طلب
+BATCH_MAX_CHARS = 4500  # أقصى حجم للطلب الواحد عند تجميع المقاطع
+CONCURRENCY = 1  # أكثر من 1 لتفعيل المحرك غير المتزامن
+REQUESTS_PER_SECOND = 0.5
+CHARS_PER_MINUTE = None  # بدون حد
+# تنظيم المعدل (AIMD): يبدأ بـ PACING_INITIAL_RATE طلب/ثانية، يزيد بـ PACING_INCREASE
+# مع كل نجاح حتى PACING_MAX_RATE، وينخفض للنصف مع كل فشل حتى PACING_MIN_RATE
+PACING_INITIAL_RATE = 0.4
+PACING_MIN_RATE = 1 / 60
+PACING_MAX_RATE = 2.0
+PACING_INCREASE = 0.05
 MAX_CONSECUTIVE_FAILURES = 3
+SOURCE_LANG = 'en'
+TARGET_LANG = 'ar'
+TARGET_LANGS = None  # قائمة لغات هدف للترجمة إليها في مرور واحد (مثل ['ar', 'fr'])
+CACHE_FILE = 'cache/translations.sqlite3'
+CACHE_MAX_ENTRIES = 200000
+MEMORY_FILE = 'cache/translation_memory.sqlite3'  # ذاكرة الترجمة التقريبية (None للتعطيل)
+MEMORY_MAX_ENTRIES = 100000
+FUZZY_THRESHOLD = 0.7  # أقل تشابه (Jaccard) لإعادة استخدام ترجمة مقطع شبه مطابق
+GLOSSARY_FILE = None  # مسرد أسماء تُحمى من الترجمة أو تُستبدل بترجمة ثابتة (TSV أو JSON)
+GLOSSARY_CACHE_DIR = 'cache'  # مجلد حفظ آلة البحث المبنية من المسرد
+BACKEND = 'google'  # google أو stub (مترجم محلي بدون شبكة)
+USE_TOR = True  # توجيه الاتصال عبر Tor (يُعد عند أول طلب ترجمة فعلي)
+NETWORK_CHECKS = True  # التحقق من المتطلبات والبروكسيات واختبار المترجمين قبل أول طلب
+METRICS_SNAPSHOT_FILE = None  # ملف JSONL للقطات دورية من مقاييس الأداء (None للتعطيل)
+METRICS_SNAPSHOT_INTERVAL = 30  # ثوانٍ بين اللقطات
 
 # إعداد Tor
 def setup_tor():
@@ -67,69 +111,215 @@ NumEntryGuards 8
         print(f"خطأ في إعداد Tor: {str(e)}")
         return False
 
-# تكوين SOCKS proxy
-if setup_tor():
-    print("✅ تم إعداد Tor بنجاح")
-else:
-    print("❌ فشل في إعداد Tor")
-    sys.exit(1)
-
 
 class ChessTextProcessor:
-    def __init__(self):
+    # الأنماط التي يجب حفظها دون ترجمة، الأكثر تحديداً أولاً
+    # لأن أول بديل يطابق في الموضع هو الذي يفوز (نقلة الشطرنج قبل الرقم مثلاً)
+    PRESERVED_PATTERNS = {
+        'page_header': r'=== الصفحة \d+ ===',
+        'urls': r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+',
+        'dates': r'\d{4}[-/]\d{2}[-/]\d{2}',
+        'chess_moves': r'\d+\.\s*[KQRBN][a-h]?[1-8]?x?[a-h][1-8][+#]?',
+        'chapter': r'CHAPTER \w+',
+        'numbers': r'\d+\.',
+        'special_chars': r'[•\-\[\]\(\)]'
+    }
+    # نمط واحد بمجموعات مسماة يقسم النص في مرور واحد
+    PRESERVED_REGEX = re.compile(
+        '|'.join(f'(?P<{name}>{pattern})' for name, pattern in PRESERVED_PATTERNS.items()),
+        re.MULTILINE
+    )
+    # العلامة كما قد يعيدها المترجم (مسافات أو حالة أحرف مختلفة)
+    PLACEHOLDER_REGEX = re.compile(r'\[\s*PRESERVED_(\d+)\s*\]', re.IGNORECASE)
+
+    def __init__(self, config=None):
         """تهيئة المعالج"""
         try:
             # تعيين المتغيرات الأساسية قبل setup_logging
+            self.config = {
+                'source_lang': SOURCE_LANG,
+                'target_lang': TARGET_LANG,
+                'target_langs': TARGET_LANGS,
+                'cache_file': CACHE_FILE,
+                'cache_max_entries': CACHE_MAX_ENTRIES,
+                'memory_file': MEMORY_FILE,
+                'memory_max_entries': MEMORY_MAX_ENTRIES,
+                'fuzzy_threshold': FUZZY_THRESHOLD,
+                'glossary_file': GLOSSARY_FILE,
+                'glossary_cache_dir': GLOSSARY_CACHE_DIR,
+                'batch_max_chars': BATCH_MAX_CHARS,
+                'reflow_lines': REFLOW_LINES,
+                'dedup_segments': DEDUP_SEGMENTS,
+                'prefilter_segments': PREFILTER_SEGMENTS,
+                'concurrency': CONCURRENCY,
+                'requests_per_second': REQUESTS_PER_SECOND,
+                'chars_per_minute': CHARS_PER_MINUTE,
+                'pacing_initial_rate': PACING_INITIAL_RATE,
+                'pacing_min_rate': PACING_MIN_RATE,
+                'pacing_max_rate': PACING_MAX_RATE,
+                'pacing_increase': PACING_INCREASE,
+                'backend': BACKEND,
+                'backend_options': {},
+                'use_tor': USE_TOR,
+                'network_checks': NETWORK_CHECKS,
+                'metrics_snapshot_file': METRICS_SNAPSHOT_FILE,
+                'metrics_snapshot_interval': METRICS_SNAPSHOT_INTERVAL
+            }
+            self.config.update(config or {})
             self.current_user = CURRENT_USER
             self.start_time = datetime.now()
             self.pages_processed = 0
             self.consecutive_failures = 0
             self.current_proxy_index = 0
             self.current_translator_index = 0
+            self.cache = None
+            self.memory = None
+            self.glossary = None
+            # المعالج الأصلي عند الترجمة إلى عدة لغات (انظر for_target)
+            self.parent = None
+            # المقاطع المتكررة في الملف الحالي (بصمات) وترجماتها المحفوظة
+            self.repeated_segments = set()
+            self.segment_memo = {}
+            self.metrics = self.create_metrics()
+            # التأخير بين الطلبات يتكيف مع استجابة الخادم (ولا تأخير للمترجمات المحلية)
+            self.pacer = self.create_pacer()
 
             # إعداد التسجيل
             self.setup_logging()
             logging.info("بدء تهيئة المعالج...")
 
-            # التحقق من متطلبات النظام
-            if not self.verify_system_requirements():
-                raise Exception("فشل التحقق من متطلبات النظام")
+            # إعداد ذاكرة الترجمة المؤقتة والتقريبية
+            self.setup_cache()
+            self.setup_memory()
+            self.setup_glossary()
+
+            # إعداد الشبكة (Tor والبروكسيات واختبار المترجمين) مؤجل حتى أول طلب فعلي
+            self.network_ready = False
+            self.network_lock = threading.Lock()
+            # حالة Tor والبروكسيات والهيدرز مشتركة مع معالجات اللغات الأخرى (for_target)
+            self.network_state_ready = False
+            self.network_state_lock = threading.Lock()
+            self.headers = self.get_advanced_headers()
+            # جلسات HTTP الدائمة مشتركة بين كل المترجمين والفحوص (ولا تفتح اتصالاً قبل أول طلب)
+            self.http = shared_pool(pool_maxsize=max(10, self.config['concurrency']), headers=self.headers)
+
+            if self.backend_class().requires_network:
+                self.proxies = [{
+                    'url': None,
+                    'name': 'Direct Connection',
+                    'type': 'direct'
+                }]
+                self.translators = []
+            else:
+                logging.info(f"المترجم '{self.config['backend']}' لا يحتاج إلى الشبكة، تم تخطي إعداد Tor والبروكسيات")
+                self.proxies = [{
+                    'url': None,
+                    'name': 'Offline',
+                    'type': 'direct'
+                }]
+                self.setup_translators()
+                self.network_ready = True
 
-            # التحقق من Tor
-            if not self.verify_tor_service():
-                raise Exception("فشل في تهيئة خدمة Tor")
+            # إعداد ترميز النظام
+            sys.stdout.reconfigure(encoding='utf-8')
+            sys.stderr.reconfigure(encoding='utf-8')
 
-            # إعداد الشبكة
-            if not self.manage_network_settings():
-                raise Exception("فشل في إعداد الشبكة")
+            logging.info("✅ تم إكمال تهيئة المعالج بنجاح")
 
-            # إعداد الاتصال
-            if not self.setup_advanced_connection():
-                raise Exception("فشل في الإعداد المتقدم للاتصال")
+        except Exception as e:
+            logging.error(f"❌ فشل في تهيئة المعالج: {str(e)}")
+            raise
+
+    def ensure_network(self):
+        """إعداد الاتصال عند أول طلب ترجمة فعلي فقط
+
+        الترجمات الموجودة في الذاكرة المؤقتة والمترجمات المحلية لا تحتاج إلى الشبكة،
+        لذلك لا يُشغل Tor ولا تُختبر البروكسيات والمترجمات إلا عند الحاجة.
+        """
+        if self.network_ready:
+            return
+
+        with self.network_lock:
+            if self.network_ready:
+                return
+
+            # Tor والبروكسيات والهيدرز تُعد مرة واحدة في المعالج الأصلي، ولكل لغة مترجموها
+            owner = self.parent or self
+            owner.setup_network_state()
+            self.proxies = owner.proxies
+            self.headers = owner.headers
 
-            # إعداد البروكسيات
-            self.setup_proxies()
-            
-            # إعداد User-Agent والهيدرز
             try:
-                self.user_agents = UserAgent(verify_ssl=False)
-                self.headers = self.get_advanced_headers()
+                self.setup_translators()
             except Exception as e:
-                logging.warning(f"فشل في إعداد User-Agent المتقدم: {e}")
-                self.headers = self.get_fallback_headers()
+                logging.error(f"❌ فشل في إعداد المترجمين: {str(e)}")
+                raise NetworkSetupError(str(e)) from e
 
-            # إعداد المترجمين
-            self.setup_translators()
+            self.network_ready = True
 
-            # إعداد ترميز النظام
-            sys.stdout.reconfigure(encoding='utf-8')
-            sys.stderr.reconfigure(encoding='utf-8')
+    def setup_network_state(self):
+        """إعداد Tor والبروكسيات والهيدرز مرة واحدة دون بناء مترجمين لأي لغة"""
+        if self.network_state_ready:
+            return
 
-            logging.info("✅ تم إكمال تهيئة المعالج بنجاح")
+        with self.network_state_lock:
+            if self.network_state_ready:
+                return
+
+            logging.info("إعداد الشبكة قبل أول طلب ترجمة...")
+            checks = self.config['network_checks']
+
+            try:
+                # التحقق من متطلبات النظام
+                if checks and not self.verify_system_requirements():
+                    raise Exception("فشل التحقق من متطلبات النظام")
+
+                if self.config['use_tor']:
+                    if not setup_tor():
+                        raise Exception("فشل في إعداد Tor")
+                    print("✅ تم إعداد Tor بنجاح")
+
+                    # التحقق من Tor
+                    if checks and not self.verify_tor_service():
+                        raise Exception("فشل في تهيئة خدمة Tor")
+
+                # إعداد البروكسيات
+                self.setup_proxies()
+
+                # إعداد User-Agent والهيدرز
+                try:
+                    self.user_agents = UserAgent(verify_ssl=False)
+                    self.headers = self.get_advanced_headers()
+                except Exception as e:
+                    logging.warning(f"فشل في إعداد User-Agent المتقدم: {e}")
+                    self.headers = self.get_fallback_headers()
+                self.http.update_headers(self.headers)
+
+            except Exception as e:
+                logging.error(f"❌ فشل في إعداد الشبكة: {str(e)}")
+                raise NetworkSetupError(str(e)) from e
+
+            self.network_state_ready = True
+
+    def renew_tor_circuit(self):
+        """طلب دائرة Tor جديدة (NEWNYM) دون إعادة تشغيل الخدمة"""
+        if not self.config['use_tor'] or not self.backend_class().requires_network:
+            return False
+
+        try:
+            with Controller.from_port(port=9051) as controller:
+                try:
+                    controller.authenticate(password="9090")
+                except Exception:
+                    controller.authenticate()
+                controller.signal(Signal.NEWNYM)
+
+            logging.info("تم طلب دائرة Tor جديدة")
+            return True
 
         except Exception as e:
-            logging.error(f"❌ فشل في تهيئة المعالج: {str(e)}")
-            raise
+            logging.warning(f"فشل تجديد دائرة Tor: {str(e)}")
+            return False
 
     def setup_tor_connection(self):
         """إعداد اتصال Tor"""
@@ -194,14 +384,8 @@ class ChessTextProcessor:
                     logging.error(f"المنفذ {port} غير متاح")
                     return False
             
-            # اختبار الاتصال عبر Tor
-            session = requests.Session()
-            session.proxies = {
-                'http': 'socks5h://127.0.0.1:9050',
-                'https': 'socks5h://127.0.0.1:9050'
-            }
-            
-            response = session.get('https://check.torproject.org/', timeout=10)
+            # اختبار الاتصال عبر Tor (الاتصال يبقى مفتوحاً لطلبات الترجمة)
+            response = self.http.get('https://check.torproject.org/', proxies='socks5h://127.0.0.1:9050', timeout=10)
             if 'Congratulations' in response.text:
                 logging.info("✅ تم التحقق من خدمة Tor بنجاح")
                 return True
@@ -275,8 +459,15 @@ class ChessTextProcessor:
             'X-Real-IP': ''
         }
         return headers
-    
-    
+
+    def get_fallback_headers(self):
+        """هيدرز احتياطية بسيطة عند فشل إعداد User-Agent"""
+        return {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/98.0.4758.102 Safari/537.36',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.5'
+        }
+
     def verify_system_requirements(self):
         """التحقق من متطلبات النظام والمكتبات"""
         try:
@@ -312,8 +503,7 @@ class ChessTextProcessor:
                 return False
 
             # التحقق من وجود Tor
-            tor_path = self.check_tor_installation()
-            if not tor_path:
+            if self.config['use_tor'] and not self.check_tor_installation():
                 logging.error("❌ Tor غير مثبت في النظام")
                 return False
 
@@ -463,6 +653,18 @@ class ChessTextProcessor:
     
     def setup_translators(self):
         """إعداد المترجمين مع تحسينات الأمان"""
+        if self.config['backend'] != 'google':
+            # المترجمات الأخرى لا تحتاج إلى بروكسيات أو جلسات
+            self.translators = [create_backend(
+                self.config['backend'],
+                self.config['source_lang'],
+                self.config['target_lang'],
+                **self.config['backend_options']
+            )]
+            self.current_translator_index = 0
+            logging.info(f"تم إعداد المترجم: {self.config['backend']}")
+            return
+
         try:
             # تعطيل IPv6
             requests.packages.urllib3.util.connection.HAS_IPV6 = False
@@ -478,39 +680,24 @@ class ChessTextProcessor:
                 {
                     'http': 'socks5h://127.0.0.1:9150',
                     'https': 'socks5h://127.0.0.1:9150'
-                },
-                None  # مترجم مباشر للطوارئ
-            ]
+                }
+            ] if self.config['use_tor'] else []
+            proxy_configs.append(None)  # مترجم مباشر للطوارئ
 
             # إنشاء مترجم لكل تكوين بروكسي
             for proxy in proxy_configs:
                 try:
-                    translator = GoogleTranslator(
-                        source='en',
-                        target='ar',
+                    # الطلبات تمر عبر جلسة البروكسي الدائمة في self.http
+                    translator = GoogleBackend(
+                        self.config['source_lang'],
+                        self.config['target_lang'],
                         proxies=proxy,
-                        timeout=30
+                        timeout=30,
+                        http=self.http
                     )
-                    
-                    if hasattr(translator, 'session'):
-                        # تكوين الجلسة
-                        translator.session.verify = True
-                        translator.session.trust_env = False
-                        translator.session.headers.update(self.get_advanced_headers())
-                        
-                        # إعداد محاولات إعادة الاتصال
-                        adapter = requests.adapters.HTTPAdapter(
-                            pool_connections=5,
-                            pool_maxsize=10,
-                            max_retries=3,
-                            pool_block=False
-                        )
-                        translator.session.mount('http://', adapter)
-                        translator.session.mount('https://', adapter)
-                    
-                    # اختبار المترجم
-                    test_result = translator.translate("test")
-                    if test_result:
+
+                    # اختبار المترجم (يمكن تخطيه عبر network_checks)
+                    if not self.config['network_checks'] or translator.translate("test"):
                         self.translators.append(translator)
                         logging.info(f"تم إضافة مترجم جديد (بروكسي: {proxy})")
                     
@@ -520,7 +707,7 @@ class ChessTextProcessor:
 
             if not self.translators:
                 # إضافة مترجم مباشر كحل أخير
-                self.translators.append(GoogleTranslator(source='en', target='ar'))
+                self.translators.append(GoogleBackend(self.config['source_lang'], self.config['target_lang'], http=self.http))
                 logging.warning("تم إعداد مترجم مباشر فقط")
             
             self.current_translator_index = 0
@@ -529,9 +716,83 @@ class ChessTextProcessor:
         except Exception as e:
             logging.error(f"خطأ في إعداد المترجمين: {str(e)}")
             # إعداد مترجم واحد للطوارئ
-            self.translators = [GoogleTranslator(source='en', target='ar')]
+            self.translators = [GoogleBackend(self.config['source_lang'], self.config['target_lang'])]
             self.current_translator_index = 0
 
+    def backend_class(self):
+        """صنف المترجم المحدد في الإعدادات"""
+        if self.config['backend'] not in BACKENDS:
+            raise ValueError(f"مترجم غير معروف: {self.config['backend']}")
+        return BACKENDS[self.config['backend']]
+
+    def rotate_translator(self):
+        """تدوير المترجم المستخدم"""
+        if len(self.translators) > 1:
+            self.current_translator_index = (self.current_translator_index + 1) % len(self.translators)
+            logging.info(f"تم التبديل إلى المترجم رقم: {self.current_translator_index}")
+
+    def setup_cache(self):
+        """إعداد ذاكرة الترجمة المؤقتة على القرص"""
+        if not self.config['cache_file']:
+            logging.info("ذاكرة الترجمة المؤقتة معطلة")
+            return
+
+        try:
+            self.cache = TranslationCache(
+                self.config['cache_file'],
+                max_entries=self.config['cache_max_entries']
+            )
+        except Exception as e:
+            logging.warning(f"فشل في فتح ذاكرة الترجمة المؤقتة: {str(e)}")
+            self.cache = None
+
+    def setup_memory(self):
+        """إعداد ذاكرة الترجمة التقريبية للمقاطع شبه المتطابقة"""
+        if not self.config['memory_file']:
+            logging.info("ذاكرة الترجمة التقريبية معطلة")
+            return
+
+        try:
+            self.memory = TranslationMemory(
+                self.config['memory_file'],
+                threshold=self.config['fuzzy_threshold'],
+                max_entries=self.config['memory_max_entries']
+            )
+        except Exception as e:
+            logging.warning(f"فشل في فتح ذاكرة الترجمة التقريبية: {str(e)}")
+            self.memory = None
+
+    def setup_glossary(self):
+        """تحميل مسرد المصطلحات المحمية (تُبنى آلة البحث مرة واحدة وتُحفظ على القرص)"""
+        if not self.config['glossary_file']:
+            return
+
+        try:
+            # الترجمات الثابتة المكتوبة دون لغة تخص اللغة الهدف الأساسية
+            self.glossary = Glossary.load(
+                self.config['glossary_file'],
+                self.config['glossary_cache_dir'],
+                lang=self.config['target_lang']
+            )
+        except Exception as e:
+            logging.warning(f"فشل في تحميل المسرد: {str(e)}")
+            self.glossary = None
+
+    def cache_key_args(self):
+        """معاملات مفتاح الذاكرة المؤقتة (اللغة المصدر، اللغة الهدف، المترجم)"""
+        return self.config['source_lang'], self.config['target_lang'], self.config['backend']
+
+    def cleanup(self):
+        """تنظيف الموارد"""
+        if self.cache:
+            logging.info(f"إحصائيات ذاكرة الترجمة المؤقتة: {self.cache.stats()}")
+            self.cache.close()
+            self.cache = None
+        if self.memory:
+            logging.info(f"إحصائيات ذاكرة الترجمة التقريبية: {self.memory.stats()}")
+            self.memory.close()
+            self.memory = None
+
     def setup_logging(self):
         """إعداد التسجيل مع تنسيق متقدم"""
         try:
@@ -597,10 +858,10 @@ class ChessTextProcessor:
                     'name': 'Tor Browser',
                     'type': 'tor'
                 }
-            ]
+            ] if self.config['use_tor'] else []
 
             for config in proxy_configs:
-                if self.test_proxy(config['url']):
+                if not self.config['network_checks'] or self.test_proxy(config['url']):
                     self.proxies.append(config)
                     logging.info(f"تم إضافة بروكسي: {config['name']}")
 
@@ -632,15 +893,8 @@ class ChessTextProcessor:
             return True
 
         try:
-            session = requests.Session()
-            session.proxies = {
-                'http': proxy_url,
-                'https': proxy_url
-            }
-            session.headers.update(self.get_advanced_headers())
-
-            # اختبار الاتصال
-            response = session.get('https://api.ipify.org?format=json', timeout=timeout)
+            # اختبار الاتصال عبر جلسة البروكسي الدائمة
+            response = self.http.get('https://api.ipify.org?format=json', proxies=proxy_url, timeout=timeout)
             if response.status_code == 200:
                 logging.info(f"بروكسي {proxy_url} يعمل بنجاح")
                 return True
@@ -652,6 +906,9 @@ class ChessTextProcessor:
 
     def rotate_proxy(self):
         """تدوير البروكسي مع التعامل مع الأخطاء"""
+        if len(self.proxies) <= 1:
+            return False
+
         previous_proxy = self.proxies[self.current_proxy_index]
         
         try:
@@ -662,10 +919,8 @@ class ChessTextProcessor:
             # إذا كان البروكسي من نوع Tor، نقوم بتجديد المسار
             if current_proxy['type'] == 'tor':
                 self.renew_tor_circuit()
-                
-            # تأخير عشوائي قبل استخدام البروكسي الجديد
-            time.sleep(random.uniform(1, 3))
-            
+
+            # لا تأخير هنا: موعد الطلب التالي يحدده منظم المعدل (self.pacer)
             logging.info(f"تم التبديل من {previous_proxy['name']} إلى {current_proxy['name']}")
             return True
             
@@ -679,41 +934,61 @@ class ChessTextProcessor:
         """ترجمة النص مع معالجة متقدمة للأخطاء وتغيير المترجمين"""
         if not text or not text.strip():
             return text
+        if not self.is_translatable(text):
+            self.metrics.incr('skipped_segments')
+            return text
+
+        # البحث في ذاكرة الترجمة المؤقتة قبل الإرسال
+        if self.cache:
+            cached = self.cache.get(text.strip(), *self.cache_key_args())
+            self.metrics.incr('cache_misses' if cached is None else 'cache_hits')
+            if cached is not None:
+                return cached
 
-        original_text = text
+        result = self.request_translation(text.strip(), max_retries)
+        if result is None:
+            # إذا فشلت كل المحاولات نعيد النص الأصلي
+            return text
+
+        if self.cache:
+            self.cache.put(text.strip(), *self.cache_key_args(), result)
+        return result
+
+    def request_translation(self, text, max_retries=5):
+        """إرسال النص إلى المترجم مع إعادة المحاولة، يعيد None عند فشل جميع المحاولات"""
         last_error = None
+        self.ensure_network()
 
         for attempt in range(max_retries):
             try:
                 # تجديد اتصال Tor قبل كل محاولة
                 if attempt > 0:
                     self.renew_tor_circuit()
-                    time.sleep(2)  # انتظار بعد تجديد المسار
 
-                # اختيار المترجم
+                # انتظار الموعد الذي يحدده منظم المعدل (يطول تلقائياً بعد الفشل)
+                with self.metrics.timer('pacing_wait'):
+                    self.pacer.wait()
+
+                # اختيار المترجم (الهيدرز مضبوطة مسبقاً في جلسته الدائمة)
                 translator = self.translators[self.current_translator_index]
-                
-                # تحديث الجلسة والهيدرز
-                if hasattr(translator, 'session'):
-                    current_proxy = self.proxies[self.current_proxy_index]
-                    if current_proxy['url']:
-                        translator.session.proxies = {
-                            'http': current_proxy['url'],
-                            'https': current_proxy['url']
-                        }
-                    translator.session.headers.update(self.get_advanced_headers())
-                    translator.session.headers['X-Attempt'] = str(attempt)
 
                 # محاولة الترجمة
-                result = translator.translate(text.strip())
+                result = self.timed_translate(translator, text)
                 
                 if result and isinstance(result, str):
                     self.consecutive_failures = 0  # إعادة تعيين عداد الفشل
+                    self.pacer.success()
                     return result
 
             except Exception as e:
                 last_error = str(e)
                 logging.warning(f"فشل المحاولة {attempt + 1}: {last_error}")
+                if isinstance(e, RateLimitError):
+                    self.metrics.incr('rate_limited')
+                    self.pacer.failure(e.retry_after or RATE_LIMIT_BACKOFF)
+                else:
+                    self.metrics.incr('request_errors')
+                    self.pacer.failure()
                 
                 # زيادة عداد الفشل
                 self.consecutive_failures += 1
@@ -723,171 +998,750 @@ class ChessTextProcessor:
                     self.rotate_translator()
                     self.rotate_proxy()
                     self.consecutive_failures = 0
-                
-                # تأخير تصاعدي بين المحاولات
-                time.sleep((attempt + 1) * 2)
                 continue
 
-        # إذا فشلت كل المحاولات، نسجل الخطأ ونعيد النص الأصلي
+        # إذا فشلت كل المحاولات، نسجل الخطأ
+        self.metrics.incr('failed_translations')
         logging.error(f"فشلت جميع محاولات الترجمة. آخر خطأ: {last_error}")
-        return original_text
+        return None
+
+    def send_translation(self, text):
+        """إرسال طلب واحد إلى المترجم الحالي مع إعداد الشبكة عند أول طلب"""
+        self.ensure_network()
+        return self.timed_translate(self.translators[self.current_translator_index], text)
+
+    def timed_translate(self, translator, text):
+        """طلب ترجمة واحد مع تسجيل زمنه وحجمه في المقاييس حسب المترجم"""
+        self.metrics.incr('requests')
+        self.metrics.incr('request_chars', len(text))
+        with self.metrics.timer(f"request.{self.config['backend']}"):
+            return translator.translate(text)
+
+    def translate_segments(self, segments, failed=None):
+        """ترجمة قائمة مقاطع مع تجميع المقاطع القصيرة في طلبات مشتركة
+
+        المقاطع التي فشلت ترجمتها تبقى كما هي، وتُضاف مواضعها إلى failed إن مُررت.
+        """
+        results, texts, positions = self.lookup_segments(segments)
+
+        for batch in pack_segments(texts, self.batch_limit()):
+            translated = self.translate_batch([texts[j] for j in batch])
+            self.store_batch(results, positions, texts, batch, translated, failed)
+            self.rotate_identity()
+
+        return results
+
+    async def translate_segments_async(self, segments, engine, failed=None):
+        """نسخة غير متزامنة من translate_segments ترسل الدفعات بالتوازي عبر المحرك"""
+        results, texts, positions = self.lookup_segments(segments)
+
+        batches = pack_segments(texts, self.batch_limit())
+        translated = await asyncio.gather(*(
+            self.translate_batch_async([texts[j] for j in batch], engine)
+            for batch in batches
+        ))
+        for batch, batch_translated in zip(batches, translated):
+            self.store_batch(results, positions, texts, batch, batch_translated, failed)
+
+        return results
+
+    def lookup_segments(self, segments):
+        """تحديد النصوص الفريدة التي تحتاج إلى طلب ترجمة
+
+        المقاطع الفارغة أو غير القابلة للترجمة أو المترجمة مسبقاً (في الملف الحالي أو الذاكرة المؤقتة
+        أو ذاكرة الترجمة التقريبية) تُملأ مباشرة في النتائج، والمقاطع المتطابقة بعد التوحيد تُرسل مرة واحدة.
+        يعيد (النتائج الأولية، النصوص الفريدة المتبقية، مواضع كل نص مع أرقام علاماته).
+        """
+        results = list(segments)
+        texts = []
+        positions = []
+        unique = {}
+
+        for i, segment in enumerate(segments):
+            if not segment or not segment.strip():
+                continue
+            if not self.is_translatable(segment):
+                self.metrics.incr('skipped_segments')
+                continue
 
-    def process_text_block(self, text, chunk_size=CHUNK_SIZE):
-        """معالجة النص مع الحفاظ على العناصر المهمة"""
-        if not text or not text.strip():
-            return text
+            key, numbers = self.normalize_segment(segment)
+            cached = self.segment_memo.get(key)
+            if cached is not None:
+                self.metrics.incr('duplicate_segments')
+            elif self.cache:
+                with self.metrics.timer('cache_lookup'):
+                    cached = self.cache.get(key, *self.cache_key_args())
+                self.metrics.incr('cache_misses' if cached is None else 'cache_hits')
+            if cached is None and self.memory and key not in unique:
+                with self.metrics.timer('memory_lookup'):
+                    cached = self.memory.get(key, *self.cache_key_args())
+                if cached is not None:
+                    self.metrics.incr('fuzzy_hits')
+            if cached is not None:
+                results[i] = self.denormalize_segment(cached, numbers)
+                continue
 
-        try:
-            # الأنماط التي يجب حفظها
-            preserved_patterns = {
-                'page_header': r'=== الصفحة \d+ ===',
-                'chapter': r'CHAPTER \w+',
-                'numbers': r'\d+\.',
-                'special_chars': r'[•\-\[\]\(\)]',
-                'chess_moves': r'\d+\.\s*[KQRBN][a-h]?[1-8]?x?[a-h][1-8][+#]?',
-                'dates': r'\d{4}[-/]\d{2}[-/]\d{2}',
-                'urls': r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
-            }
+            if key in unique:
+                self.metrics.incr('duplicate_segments')
+            else:
+                unique[key] = len(texts)
+                texts.append(key)
+                positions.append([])
+            positions[unique[key]].append((i, numbers))
 
-            # حفظ العناصر المهمة
-            preserved = []
-            for pattern_name, pattern in preserved_patterns.items():
-                matches = re.finditer(pattern, text, re.MULTILINE)
-                for match in matches:
-                    preserved.append({
-                        'start': match.start(),
-                        'end': match.end(),
-                        'content': match.group(),
-                        'type': pattern_name,
-                        'placeholder': f"[PRESERVED_{len(preserved)}]"
-                    })
-                    text = text[:match.start()] + f"[PRESERVED_{len(preserved)-1}]" + text[match.end():]
-
-            # تقسيم النص إلى أجزاء
-            chunks = []
-            current_chunk = []
-            for line in text.split('\n'):
-                if len(' '.join(current_chunk)) > chunk_size:
-                    chunks.append('\n'.join(current_chunk))
-                    current_chunk = []
-                current_chunk.append(line)
-            
-            if current_chunk:
-                chunks.append('\n'.join(current_chunk))
-
-            # ترجمة كل جزء
-            translated_chunks = []
-            for chunk in chunks:
-                translated_chunk = self.translate_with_retry(chunk)
-                translated_chunks.append(translated_chunk)
-                
-                # تأخير ذكي بين الأجزاء
-                self.smart_delay()
+        return results, texts, positions
+
+    def is_translatable(self, segment):
+        """هل يحتوي المقطع على نص بلغة المصدر يستحق طلب ترجمة
+
+        بعد حذف علامات النصوص المحمية يجب أن يبقى حرف واحد على الأقل من كتابة
+        اللغة المصدر (اللاتينية للإنجليزية مثلاً). الفواصل والأرقام والمقاطع
+        المكتوبة بكتابة أخرى (كالعربية) تُمرر كما هي دون طلب.
+        """
+        if not self.config['prefilter_segments']:
+            return True
+
+        text = self.PLACEHOLDER_REGEX.sub('', segment)
+        return has_language_letters(text, self.config['source_lang'])
 
-            # دمج الأجزاء المترجمة
-            translated_text = '\n'.join(translated_chunks)
+    def store_batch(self, results, positions, texts, batch, translated, failed=None):
+        """توزيع ترجمات الدفعة على جميع مواضعها وحفظها في الذاكرة المؤقتة"""
+        for j, result in zip(batch, translated):
+            if result is None:
+                if failed is not None:
+                    failed.update(i for i, _ in positions[j])
+                continue
+            for i, numbers in positions[j]:
+                results[i] = self.denormalize_segment(result, numbers)
+            if hash(texts[j]) in self.repeated_segments:
+                self.segment_memo[texts[j]] = result
+            if self.cache:
+                self.cache.put(texts[j], *self.cache_key_args(), result)
+            if self.memory:
+                self.memory.put(texts[j], *self.cache_key_args(), result)
+
+    def normalize_segment(self, segment):
+        """توحيد المقطع للمقارنة: إزالة المسافات الزائدة وترقيم العلامات محلياً
+
+        أرقام العلامات خاصة بكل صفحة، لذا تُعاد ترقيمها من الصفر داخل المقطع
+        لكي تتطابق الأسطر المتكررة في صفحات مختلفة. يعيد (النص الموحد، الأرقام الأصلية).
+        """
+        numbers = []
+
+        def renumber(match):
+            numbers.append(match.group(1))
+            return f"[PRESERVED_{len(numbers) - 1}]"
+
+        text = '\n'.join(' '.join(line.split()) for line in segment.strip().split('\n'))
+        return self.PLACEHOLDER_REGEX.sub(renumber, text), numbers
+
+    def denormalize_segment(self, text, numbers):
+        """إعادة أرقام العلامات الأصلية إلى ترجمة المقطع الموحد"""
+        if not numbers:
+            return text
+
+        def restore(match):
+            index = int(match.group(1))
+            return f"[PRESERVED_{numbers[index]}]" if index < len(numbers) else match.group()
+
+        return self.PLACEHOLDER_REGEX.sub(restore, text)
+
+    def batch_limit(self):
+        """أقصى عدد أحرف في الطلب المجمع حسب الإعدادات وحدود المترجم"""
+        # قبل إعداد الشبكة لا توجد مترجمات بعد، فيُستخدم حد صنف المترجم
+        translator = self.translators[self.current_translator_index] if self.translators else self.backend_class()
+        return min(self.config['batch_max_chars'], translator.max_chars)
+
+    def translate_batch(self, texts):
+        """ترجمة عدة مقاطع في طلب واحد، مع الرجوع للترجمة المنفردة عند اختلاف الفواصل"""
+        if len(texts) == 1:
+            return [self.request_translation(texts[0])]
+
+        result = self.request_translation(join_batch(texts))
+        if result is None:
+            return [None] * len(texts)
+
+        translated = split_batch(result, len(texts))
+        if translated is not None:
+            return translated
+
+        logging.warning(f"لم تتطابق فواصل الدفعة ({len(texts)} مقطع)، سيتم ترجمة كل مقطع على حدة")
+        translated = []
+        for text in texts:
+            translated.append(self.request_translation(text))
+            self.rotate_identity()
+        return translated
+
+    async def translate_batch_async(self, texts, engine):
+        """نسخة غير متزامنة من translate_batch"""
+        if len(texts) == 1:
+            return [await engine.translate(texts[0], self.send_translation)]
+
+        result = await engine.translate(join_batch(texts), self.send_translation)
+        if result is None:
+            return [None] * len(texts)
+
+        translated = split_batch(result, len(texts))
+        if translated is not None:
+            return translated
+
+        logging.warning(f"لم تتطابق فواصل الدفعة ({len(texts)} مقطع)، سيتم ترجمة كل مقطع على حدة")
+        return list(await asyncio.gather(*(engine.translate(text, self.send_translation) for text in texts)))
+
+    def prepare_text_block(self, text, chunk_size=CHUNK_SIZE):
+        """حفظ العناصر المهمة وتقسيم النص إلى أجزاء للترجمة"""
+        with self.metrics.timer('protect'):
+            text, preserved = self.protect_text(text)
+
+        # تقسيم النص إلى أجزاء على حدود الفقرات والجمل دون تجاوز حد المترجم،
+        # مع فصل الفقرات المتكررة في الملف في أجزاء مستقلة
+        with self.metrics.timer('chunk'):
+            chunks = chunk_text(
+                text,
+                min(chunk_size, self.batch_limit()),
+                self.config['reflow_lines'],
+                isolate=self.is_repeated_segment if self.repeated_segments else None
+            )
 
-            # استعادة العناصر المحفوظة
-            for item in preserved:
-                translated_text = translated_text.replace(item['placeholder'], item['content'])
+        return chunks, preserved
+
+    def protect_text(self, text):
+        """استبدال العناصر المحفوظة بعلامات في مرور واحد، يعيد (النص، العناصر المحفوظة)"""
+        preserved = []
+        parts = []
+        position = 0
+        for start, end, content, kind, term in self.find_protected(text):
+            placeholder = f"[PRESERVED_{len(preserved)}]"
+            preserved.append({
+                'start': start,
+                'end': end,
+                'content': content,
+                'type': kind,
+                'term': term,
+                'placeholder': placeholder
+            })
+            parts.append(text[position:start])
+            parts.append(placeholder)
+            position = end
+        parts.append(text[position:])
+
+        return ''.join(parts), preserved
+
+    def find_protected(self, text):
+        """العناصر المحفوظة في النص كـ (البداية، النهاية، النص الأصلي، النوع، رقم المصطلح)
+
+        تجمع أنماط PRESERVED_REGEX ومصطلحات المسرد (رقم المصطلح None لغيرها). عند
+        التداخل يُختار الأسبق ثم الأطول. ترجمة المصطلح الثابتة تُختار عند الاستعادة
+        لأنها تعتمد على اللغة الهدف.
+        """
+        matches = [
+            (match.start(), match.end(), match.group(), match.lastgroup, None)
+            for match in self.PRESERVED_REGEX.finditer(text)
+        ]
+        if not self.glossary:
+            return matches
 
+        terms = self.glossary.find(text)
+        if not terms:
+            return matches
+
+        matches.extend(
+            (start, end, text[start:end], 'glossary', term)
+            for start, end, term in terms
+        )
+        matches.sort(key=lambda match: (match[0], match[0] - match[1]))
+        selected = []
+        position = 0
+        for match in matches:
+            if match[0] >= position:
+                selected.append(match)
+                position = match[1]
+        return selected
+
+    def is_repeated_segment(self, paragraph):
+        """هل تكررت الفقرة (بعد التوحيد) في الملف الحالي"""
+        return hash(self.normalize_segment(paragraph)[0]) in self.repeated_segments
+
+    def scan_pages(self, pages):
+        """مرور أولي على صفحات الملف لعدها وتحديد الفقرات التي تتكرر أكثر من مرة
+
+        pages أزواج (علامة الصفحة، النص) كما يعيدها iter_pages. تُحفظ بصمات الفقرات
+        فقط وليس نصوصها، لذا تبقى الذاكرة صغيرة حتى للكتب الكبيرة.
+        يعيد (عدد الصفحات، بصمات الفقرات المتكررة).
+        """
+        counts = Counter()
+        total_pages = 0
+        for page_header, page in pages:
+            if page_header is None and not page.strip():
+                continue
+            total_pages += 1
+            text, _ = self.protect_text(page)
+            for paragraph in split_paragraphs(text, self.config['reflow_lines']):
+                if paragraph.strip():
+                    counts[hash(self.normalize_segment(paragraph)[0])] += 1
+
+        return total_pages, {key for key, count in counts.items() if count > 1}
+
+    def restore_text_block(self, translated_chunks, preserved):
+        """دمج الأجزاء المترجمة واستعادة العناصر المحفوظة"""
+        translated_text = '\n'.join(translated_chunks)
+        if not preserved:
             return translated_text
 
+        # split مع مجموعة التقاط: [نص, رقم, نص, رقم, ...]
+        parts = self.PLACEHOLDER_REGEX.split(translated_text)
+        for i in range(1, len(parts), 2):
+            index = int(parts[i])
+            parts[i] = self.preserved_content(preserved[index]) if index < len(preserved) else f"[PRESERVED_{index}]"
+
+        return ''.join(parts)
+
+    def preserved_content(self, item):
+        """النص الذي يحل محل العلامة: كما هو، أو ترجمة المصطلح الثابتة للغة الهدف"""
+        if item['type'] == 'glossary' and self.glossary:
+            return self.glossary.rendering(item['term'], item['content'], self.config['target_lang'])
+        return item['content']
+
+    def process_text_block(self, text, chunk_size=CHUNK_SIZE):
+        """معالجة النص مع الحفاظ على العناصر المهمة"""
+        if not text or not text.strip():
+            return text
+
+        try:
+            chunks, preserved = self.prepare_text_block(text, chunk_size)
+            translated_chunks = self.translate_segments(chunks)
+            return self.restore_text_block(translated_chunks, preserved)
+
         except Exception as e:
             logging.error(f"خطأ في معالجة النص: {str(e)}")
             return text
 
-    def smart_delay(self):
-        """تأخير ذكي مع تغيير متغير"""
-        base_delay = random.uniform(1.5, 3.5)
-        extra_delay = 0
-        
-        # زيادة التأخير في حالات معينة
-        if self.consecutive_failures > 0:
-            extra_delay += self.consecutive_failures * 0.5
-        
-        if self.pages_processed % 3 == 0:
-            extra_delay += random.uniform(0, 2)
-        
-        time.sleep(base_delay + extra_delay)
-        
+    def rotate_identity(self):
+        """تدوير البروكسي والهيدرز دورياً بين الطلبات (التأخير نفسه يحدده self.pacer)"""
+        # المترجمات المحلية لا تفرض حداً لمعدل الطلبات
+        if not self.backend_class().rate_limited:
+            return
+
         # تحديث العداد وتدوير البروكسي إذا لزم الأمر
         self.pages_processed += 1
         if self.pages_processed % 5 == 0:
             self.rotate_proxy()
             self.headers = self.get_advanced_headers()
+            self.http.update_headers(self.headers)
+
+    def create_metrics(self):
+        """مقاييس أداء جديدة حسب الإعدادات"""
+        return PipelineMetrics(
+            snapshot_file=self.config['metrics_snapshot_file'],
+            snapshot_interval=self.config['metrics_snapshot_interval']
+        )
+
+    def create_pacer(self):
+        """منظم معدل الطلبات حسب الإعدادات، معطل للمترجمات التي لا تفرض حداً للمعدل"""
+        return AdaptivePacer(
+            initial_rate=self.config['pacing_initial_rate'],
+            min_rate=self.config['pacing_min_rate'],
+            max_rate=self.config['pacing_max_rate'],
+            increase=self.config['pacing_increase'],
+            enabled=self.backend_class().rate_limited
+        )
+
+    def checkpoint_path(self, input_filename, target=None):
+        """مسار سجل التقدم الجانبي لملف الإدخال (سجل مستقل لكل لغة عند الترجمة إلى عدة لغات)"""
+        if target:
+            return f"{input_filename}.{target}.checkpoint.jsonl"
+        return f"{input_filename}.checkpoint.jsonl"
+
+    def for_target(self, target_lang):
+        """معالج للغة هدف أخرى لنفس الملف
+
+        يشترك مع هذا المعالج في الذاكرة المؤقتة والتقريبية والمسرد وجلسات HTTP ومنظم
+        المعدل والفقرات المتكررة، وله مترجموه وذاكرة مقاطعه ومقاييسه.
+        """
+        view = copy.copy(self)
+        view.parent = self
+        view.config = {**self.config, 'target_lang': target_lang}
+        view.segment_memo = {}
+        view.metrics = view.create_metrics()
+        view.consecutive_failures = 0
+        view.current_translator_index = 0
+        view.network_lock = threading.Lock()
+        if self.backend_class().requires_network:
+            # المترجمون يُعدون عند أول طلب فعلي لهذه اللغة
+            view.translators = []
+            view.network_ready = False
+        else:
+            view.setup_translators()
+        return view
+
+    def scan_file(self, input_filename):
+        """بدء مقاييس جديدة ومرور أولي (بالقراءة التدريجية) لعد الصفحات وتحديد الفقرات المتكررة"""
+        self.segment_memo = {}
+        self.metrics = self.create_metrics()
+        if not self.config['dedup_segments']:
+            self.repeated_segments = set()
+            return '?'
+
+        with self.metrics.timer('scan'):
+            total_pages, self.repeated_segments = self.scan_pages(iter_pages(input_filename))
+        logging.info(f"عدد الفقرات المتكررة في الملف: {len(self.repeated_segments)}")
+        return total_pages
+
+    def open_output(self, input_filename, resume=False, target=None):
+        """فتح الملف الناتج: استئناف ملف سابق من سجل التقدم أو إنشاء ملف جديد
+
+        يعيد (سجل التقدم، الملف المفتوح، الصفحات المكتملة)، والملف None إذا كانت
+        الترجمة مكتملة مسبقاً (مساره في checkpoint.output_file).
+        """
+        checkpoint = TranslationCheckpoint(self.checkpoint_path(input_filename, target))
+        resuming = (
+            resume
+            and checkpoint.load()
+            and os.path.exists(checkpoint.output_file)
+        )
+
+        if resuming and checkpoint.completed:
+            logging.info(f"الملف مترجم بالكامل مسبقاً: {checkpoint.output_file}")
+            print(f"✅ الملف مترجم بالكامل مسبقاً: {checkpoint.output_file}")
+            return checkpoint, None, checkpoint.completed_pages
+
+        if resuming:
+            output_filename = checkpoint.output_file
+            # حذف أي صفحة كتبت جزئياً بعد آخر صفحة مسجلة
+            os.truncate(output_filename, checkpoint.validate(page for _, page in iter_pages(input_filename)))
+            completed_pages = checkpoint.completed_pages
+            outfile = open(output_filename, 'a', encoding='utf-8')
+            logging.info(f"استئناف الترجمة في {output_filename} بعد {len(completed_pages)} صفحة مكتملة")
+            return checkpoint, outfile, completed_pages
+
+        # إنشاء ملف الترجمة (بلاحقة اللغة عند الترجمة إلى عدة لغات)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_filename = os.path.join(
+            os.path.dirname(input_filename),
+            f"translated_{timestamp}_{target}.txt" if target else f"translated_{timestamp}.txt"
+        )
+        outfile = open(output_filename, 'w', encoding='utf-8')
+
+        # كتابة المعلومات الوصفية
+        outfile.write(self.create_metadata())
+        outfile.write("="*50 + "\n\n")
+        outfile.flush()
+        checkpoint.start(input_filename, output_filename, outfile.tell())
+        return checkpoint, outfile, set()
+
+    def finish_output(self, checkpoint):
+        """إغلاق سجل التقدم وحفظ مقاييس الأداء بجانب الملف الناتج"""
+        checkpoint.finish()
+        output_filename = checkpoint.output_file
+
+        if self.cache:
+            logging.info(f"إحصائيات ذاكرة الترجمة المؤقتة: {self.cache.stats()}")
+        if self.memory:
+            logging.info(f"إحصائيات ذاكرة الترجمة التقريبية: {self.memory.stats()}")
+        if self.http.requests:
+            self.metrics.attach('http_pool', self.http.stats())
+
+        # ملخص مقاييس الأداء بجانب ملف الترجمة
+        metrics_file = f"{output_filename}.metrics.json"
+        self.metrics.write(metrics_file)
+        logging.info(f"مقاييس الأداء: {json.dumps(self.metrics.summary(), ensure_ascii=False)}")
+        print(f"📊 مقاييس الأداء: {metrics_file}")
+
+        logging.info(f"تم حفظ الترجمة في: {output_filename}")
+        print(f"✅ تم حفظ الترجمة في: {output_filename}")
+        if checkpoint.incomplete_page is not None:
+            print(f"⚠️ فشلت ترجمة أجزاء بدءاً من الصفحة {checkpoint.incomplete_page}، أعد التشغيل بـ --resume لإكمالها")
+        return output_filename
+
+    def process_file(self, input_filename, resume=False, targets=None):
+        """معالجة الملف مع تتبع كامل وإدارة الأخطاء
+
+        targets قائمة لغات هدف للترجمة إليها في مرور واحد (الافتراضي target_langs
+        في الإعدادات)، وعندها يُعاد قاموس {اللغة: الملف الناتج}.
+        """
+        targets = targets or self.config['target_langs']
+        if targets:
+            return self.process_file_targets(input_filename, targets, resume)
 
-    def process_file(self, input_filename):
-        """معالجة الملف مع تتبع كامل وإدارة الأخطاء"""
         try:
             # التحقق من وجود الملف
             if not os.path.exists(input_filename):
                 raise FileNotFoundError(f"الملف غير موجود: {input_filename}")
 
-            # قراءة الملف
-            with open(input_filename, 'r', encoding='utf-8') as file:
-                content = file.read()
+            total_pages = self.scan_file(input_filename)
+
+            # استئناف الملف الناتج السابق إن وجد سجل تقدم صالح
+            checkpoint, outfile, completed_pages = self.open_output(input_filename, resume)
+            if outfile is None:
+                return checkpoint.output_file
+
+            # الصفحات المكتملة سابقاً تسبق دائماً الصفحات المتبقية
+            current_page = 1 + len(completed_pages)
+            page_batches = self.iter_page_batches(iter_pages(input_filename), completed_pages)
+
+            with outfile:
+                if self.config['concurrency'] > 1:
+                    current_page = asyncio.run(self.write_page_batches_async(
+                        page_batches, outfile, checkpoint, current_page, total_pages
+                    ))
+                else:
+                    for pending_pages in page_batches:
+                        current_page = self.write_page_batch(
+                            pending_pages, outfile, checkpoint, current_page, total_pages
+                        )
 
-            # إنشاء المعلومات الوصفية
-            metadata = self.create_metadata()
+                # كتابة معلومات المعالجة النهائية
+                completion_info = self.create_completion_info(current_page - 1)
+                outfile.write("\n" + completion_info)
 
-            # تقسيم المحتوى إلى صفحات
-            pages = re.split(r'(=== الصفحة \d+ ===)', content)
-            total_pages = len([p for p in pages if p.strip()])
-            translated_pages = []
-            current_page = 1
+            return self.finish_output(checkpoint)
 
-            # إنشاء ملف الترجمة
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_filename = os.path.join(
-                os.path.dirname(input_filename),
-                f"translated_{timestamp}.txt"
-            )
+        except Exception as e:
+            logging.error(f"خطأ في معالجة الملف: {str(e)}")
+            raise
 
-            # كتابة المعلومات الوصفية
-            with open(output_filename, 'w', encoding='utf-8') as outfile:
-                outfile.write(metadata)
-                outfile.write("="*50 + "\n\n")
-
-                # معالجة كل صفحة
-                for i, page in enumerate(pages):
-                    if page.strip():
-                        try:
-                            logging.info(f"معالجة الصفحة {current_page} من {total_pages}")
-                            print(f"جاري معالجة الصفحة {current_page} من {total_pages}")
-
-                            # ترجمة الصفحة
-                            translated_page = self.process_text_block(page)
-                            translated_pages.append(translated_page)
-                            
-                            # كتابة الصفحة مباشرة إلى الملف
-                            outfile.write(translated_page + "\n")
-                            outfile.flush()  # ضمان حفظ البيانات
-                            
-                            current_page += 1
-                            
-                            # تدوير البروكسي كل عدة صفحات
-                            if current_page % 3 == 0:
-                                self.rotate_proxy()
-                                
-                        except Exception as e:
-                            logging.error(f"خطأ في معالجة الصفحة {current_page}: {str(e)}")
-                            # في حالة الخطأ، نحفظ النص الأصلي
-                            outfile.write(page + "\n")
-                            outfile.flush()
+    def process_file_targets(self, input_filename, targets, resume=False):
+        """ترجمة الملف إلى عدة لغات في مرور واحد، يعيد قاموس {اللغة: الملف الناتج}
 
-                # كتابة معلومات المعالجة النهائية
-                completion_info = self.create_completion_info(current_page - 1)
-                outfile.write("\n" + completion_info)
+        القراءة والمرور الأولي وحماية العناصر والتقسيم تتم مرة واحدة لكل صفحة، ثم تُرسل
+        أجزاء كل مجموعة صفحات إلى جميع اللغات بالتناوب (أو معاً عبر محرك غير متزامن
+        واحد يشترك في حد التزامن ومنظم المعدل). لكل لغة مترجموها وملفها الناتج وسجل تقدمها.
+        """
+        try:
+            if not os.path.exists(input_filename):
+                raise FileNotFoundError(f"الملف غير موجود: {input_filename}")
+
+            total_pages = self.scan_file(input_filename)
+            outputs = {}
+            jobs = []
+
+            with contextlib.ExitStack() as stack:
+                for target in dict.fromkeys(targets):
+                    view = self.for_target(target)
+                    checkpoint, outfile, completed_pages = view.open_output(input_filename, resume, target)
+                    outputs[target] = checkpoint.output_file
+                    if outfile is None:
+                        continue
+                    stack.enter_context(outfile)
+                    jobs.append({
+                        'view': view,
+                        'outfile': outfile,
+                        'checkpoint': checkpoint,
+                        'completed_pages': completed_pages,
+                        'current_page': 1 + len(completed_pages)
+                    })
 
-            logging.info(f"تم حفظ الترجمة في: {output_filename}")
-            print(f"✅ تم حفظ الترجمة في: {output_filename}")
-            return output_filename
+                if not jobs:
+                    return outputs
+
+                # تُجهز مرة واحدة كل صفحة لم تكتمل في لغة واحدة على الأقل
+                completed_pages = set.intersection(*(job['completed_pages'] for job in jobs))
+                page_batches = self.iter_page_batches(iter_pages(input_filename), completed_pages)
+                logging.info(f"الترجمة إلى {len(jobs)} لغة في مرور واحد: {', '.join(outputs)}")
+
+                if self.config['concurrency'] > 1:
+                    asyncio.run(self.write_target_batches_async(page_batches, jobs, total_pages))
+                else:
+                    for pending_pages in page_batches:
+                        for job in jobs:
+                            pages = self.target_pages(job, pending_pages)
+                            if pages:
+                                job['current_page'] = job['view'].write_page_batch(
+                                    pages, job['outfile'], job['checkpoint'], job['current_page'], total_pages
+                                )
+
+                for job in jobs:
+                    job['outfile'].write("\n" + job['view'].create_completion_info(job['current_page'] - 1))
+
+            for job in jobs:
+                view = job['view']
+                # مراحل التجهيز المشتركة تظهر في مقاييس كل لغة
+                view.metrics.attach('shared', self.metrics.summary())
+                view.finish_output(job['checkpoint'])
+            return outputs
 
         except Exception as e:
             logging.error(f"خطأ في معالجة الملف: {str(e)}")
             raise
 
+    @staticmethod
+    def target_pages(job, pending_pages):
+        """صفحات المجموعة التي لم تكتمل بعد في لغة المهمة"""
+        return [page for page in pending_pages if page[0] not in job['completed_pages']]
+
+    def iter_page_batches(self, pages, completed_pages):
+        """تجهيز الصفحات (أزواج علامة الصفحة والنص) وتجميع المتتالية منها حتى batch_max_chars
+        لترجمتها في طلبات مشتركة"""
+        pending_pages = []
+        pending_chars = 0
+
+        for i, (page_header, page) in enumerate(pages):
+            if (page_header is None and not page.strip()) or i in completed_pages:
+                continue
+
+            try:
+                chunks, preserved = self.prepare_text_block(page)
+            except Exception as e:
+                logging.error(f"خطأ في تجهيز الجزء {i}: {str(e)}")
+                chunks, preserved = None, None
+
+            pending_pages.append((i, page_header, page, chunks, preserved))
+            pending_chars += len(page)
+
+            if pending_chars >= self.config['batch_max_chars']:
+                yield pending_pages
+                pending_pages = []
+                pending_chars = 0
+
+        if pending_pages:
+            yield pending_pages
+
+    def write_page_batch(self, pending_pages, outfile, checkpoint, current_page, total_pages):
+        """ترجمة مجموعة صفحات في طلبات مشتركة ثم كتابتها بالترتيب"""
+        segments = self.page_batch_segments(pending_pages)
+        failed = set()
+        try:
+            translated = self.translate_segments(segments, failed)
+        except NetworkSetupError:
+            raise
+        except Exception as e:
+            logging.error(f"خطأ في ترجمة الصفحات {current_page}-{current_page + len(pending_pages) - 1}: {str(e)}")
+            translated, failed = segments, set(range(len(segments)))
+
+        return self.write_pages(pending_pages, translated, outfile, checkpoint, current_page, total_pages, failed=failed)
+
+    def create_engine(self):
+        """محرك الترجمة غير المتزامن حسب الإعدادات، يشترك في منظم المعدل"""
+        rate_limited = self.backend_class().rate_limited
+        return AsyncTranslationEngine(
+            self.send_translation,
+            concurrency=self.config['concurrency'],
+            requests_per_second=self.config['requests_per_second'] if rate_limited else None,
+            chars_per_minute=self.config['chars_per_minute'] if rate_limited else None,
+            metrics=self.metrics,
+            pacer=self.pacer
+        )
+
+    async def translate_pages_async(self, pending_pages, engine):
+        """ترجمة أجزاء مجموعة صفحات عبر المحرك، أو إعادتها كما هي عند الخطأ
+
+        يعيد (الأجزاء المترجمة، مواضع الأجزاء التي فشلت ترجمتها).
+        """
+        segments = self.page_batch_segments(pending_pages)
+        failed = set()
+        try:
+            return await self.translate_segments_async(segments, engine, failed), failed
+        except NetworkSetupError:
+            raise
+        except Exception as e:
+            logging.error(f"خطأ في ترجمة مجموعة صفحات: {str(e)}")
+            return segments, set(range(len(segments)))
+
+    async def write_page_batches_async(self, page_batches, outfile, checkpoint, current_page, total_pages):
+        """ترجمة مجموعات الصفحات بالتوازي مع كتابتها إلى الملف بترتيبها الأصلي"""
+        engine = self.create_engine()
+
+        # نافذة محدودة من المجموعات قيد الترجمة؛ تُكتب دائماً بدءاً من الأقدم
+        window = self.config['concurrency'] * 2
+        in_flight = deque()
+        for pending_pages in page_batches:
+            in_flight.append((pending_pages, asyncio.create_task(self.translate_pages_async(pending_pages, engine))))
+            if len(in_flight) >= window:
+                done_pages, task = in_flight.popleft()
+                translated, failed = await task
+                current_page = self.write_pages(
+                    done_pages, translated, outfile, checkpoint, current_page, total_pages, rotate=False, failed=failed
+                )
+
+        while in_flight:
+            done_pages, task = in_flight.popleft()
+            translated, failed = await task
+            current_page = self.write_pages(
+                done_pages, translated, outfile, checkpoint, current_page, total_pages, rotate=False, failed=failed
+            )
+
+        logging.info(f"المحرك غير المتزامن: {engine.requests} طلب، {engine.failures} فشل")
+        return current_page
+
+    async def write_target_batches_async(self, page_batches, jobs, total_pages):
+        """نسخة غير متزامنة لعدة لغات: كل مجموعة صفحات تُرسل إلى جميع اللغات معاً عبر
+        محرك واحد، وتُكتب في ملف كل لغة بترتيبها الأصلي"""
+        engine = self.create_engine()
+
+        async def write_tasks(tasks):
+            for job, pages, task in tasks:
+                translated, failed = await task
+                job['current_page'] = job['view'].write_pages(
+                    pages, translated, job['outfile'], job['checkpoint'], job['current_page'], total_pages,
+                    rotate=False, failed=failed
+                )
+
+        window = self.config['concurrency'] * 2
+        in_flight = deque()
+        for pending_pages in page_batches:
+            tasks = []
+            for job in jobs:
+                pages = self.target_pages(job, pending_pages)
+                if pages:
+                    tasks.append((job, pages, asyncio.create_task(job['view'].translate_pages_async(pages, engine))))
+            in_flight.append(tasks)
+            if len(in_flight) >= window:
+                await write_tasks(in_flight.popleft())
+
+        while in_flight:
+            await write_tasks(in_flight.popleft())
+
+        logging.info(f"المحرك غير المتزامن: {engine.requests} طلب، {engine.failures} فشل")
+
+    def page_batch_segments(self, pending_pages):
+        """جميع أجزاء الترجمة لمجموعة صفحات بالترتيب"""
+        return [chunk for _, _, _, chunks, _ in pending_pages if chunks for chunk in chunks]
+
+    def write_pages(self, pending_pages, translated, outfile, checkpoint, current_page, total_pages,
+                    rotate=True, failed=()):
+        """استعادة العناصر المحفوظة وكتابة الصفحات المترجمة وتسجيلها في سجل التقدم
+
+        failed مواضع الأجزاء التي فشلت ترجمتها؛ الصفحة التي تحتوي أحدها تُكتب (بنصها
+        الأصلي في تلك الأجزاء) لكن يتوقف عندها سجل التقدم لتُترجم من جديد عند الاستئناف.
+        """
+        position = 0
+        for index, page_header, page, chunks, preserved in pending_pages:
+            logging.info(f"معالجة الصفحة {current_page} من {total_pages}")
+            print(f"جاري معالجة الصفحة {current_page} من {total_pages}")
+
+            if chunks is None:
+                # في حالة الخطأ، نحفظ النص الأصلي
+                translated_page = page
+            else:
+                with self.metrics.timer('restore'):
+                    translated_page = self.restore_text_block(
+                        translated[position:position + len(chunks)], preserved
+                    )
+                if any(position + k in failed for k in range(len(chunks))):
+                    self.metrics.incr('failed_pages')
+                    checkpoint.stop_recording(current_page)
+                position += len(chunks)
+
+            # كتابة الصفحة مباشرة إلى الملف
+            with self.metrics.timer('write'):
+                if page_header is not None:
+                    # علامة الصفحة تُكتب كما هي دون ترجمة
+                    outfile.write(page_header + "\n")
+                outfile.write(translated_page + "\n")
+                outfile.flush()  # ضمان حفظ البيانات
+                checkpoint.record_page(index, page, outfile.tell())
+
+            self.metrics.incr('pages')
+            self.metrics.incr('chars_translated', len(page))
+            self.metrics.maybe_snapshot()
+            current_page += 1
+
+            # تدوير البروكسي كل عدة صفحات (في الوضع المتزامن فقط)
+            if rotate and current_page % 3 == 0:
+                self.rotate_proxy()
+
+        return current_page
+
     def create_metadata(self):
         """إنشاء المعلومات الوصفية للملف"""
         current_time = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
@@ -898,40 +1752,103 @@ class ChessTextProcessor:
             f"Current User's Login: {self.current_user}\n"
             f"System Info: {system_info.system} {system_info.release}\n"
             f"Processing Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
-            f"Translator Version: deep-translator\n"
-            f"Proxy Configuration: {self.proxies[self.current_proxy_index]['name']}\n\n"
+            f"Translator Version: {'deep-translator' if self.config['backend'] == 'google' else self.config['backend']}\n\n"
         )
         return metadata
 
     def create_completion_info(self, pages_processed):
-        """إنشاء معلومات إكمال المعالجة"""
+        """إنشاء معلومات إكمال المعالجة
+
+        إعداد البروكسي يُكتب هنا لا في الرأس لأن الشبكة تُعد عند أول طلب فعلي فقط.
+        """
+        proxy = (
+            self.proxies[self.current_proxy_index]['name']
+            if self.network_ready else 'None (no network requests)'
+        )
         return (
             f"\n{'='*50}\n"
             f"Processing Completed: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"
             f"Total Pages Processed: {pages_processed}\n"
+            f"Proxy Configuration: {proxy}\n"
             f"Translation Status: Complete\n"
             f"{'='*50}\n"
         )
 
+def parse_args():
+    """قراءة معاملات سطر الأوامر"""
+    parser = argparse.ArgumentParser(description="ترجمة ملف نصي مستخرج من PDF")
+    parser.add_argument(
+        'input_file',
+        nargs='?',
+        default="/home/dc/Public/fml/output/document.txt",
+        help="مسار الملف المراد ترجمته"
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help="استئناف آخر ترجمة غير مكتملة لنفس الملف بدلاً من البدء من جديد"
+    )
+    parser.add_argument(
+        '--targets',
+        nargs='+',
+        default=TARGET_LANGS,
+        help="الترجمة إلى عدة لغات في مرور واحد (مثل: --targets ar fr de)"
+    )
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=CONCURRENCY,
+        help="عدد الطلبات المتزامنة (أكثر من 1 لتفعيل المحرك غير المتزامن)"
+    )
+    parser.add_argument(
+        '--no-tor',
+        action='store_true',
+        help="الاتصال المباشر دون إعداد Tor"
+    )
+    parser.add_argument(
+        '--skip-network-checks',
+        action='store_true',
+        help="تخطي فحوص المتطلبات والبروكسيات واختبار المترجمين قبل أول طلب"
+    )
+    parser.add_argument(
+        '--glossary',
+        default=GLOSSARY_FILE,
+        help="ملف مسرد الأسماء المحمية (سطر لكل مصطلح، والترجمة الثابتة اختيارية بعد علامة جدولة)"
+    )
+    parser.add_argument(
+        '--metrics-snapshot',
+        default=METRICS_SNAPSHOT_FILE,
+        help="ملف JSONL لحفظ لقطات دورية من مقاييس الأداء أثناء الترجمة"
+    )
+    return parser.parse_args()
+
 def main():
     """الدالة الرئيسية للبرنامج"""
+    args = parse_args()
     processor = None
     try:
         # إنشاء المعالج
-        processor = ChessTextProcessor()
-
-        # التحقق من متطلبات النظام
-        if not processor.verify_system_requirements():
-            raise Exception("فشل التحقق من متطلبات النظام")
+        processor = ChessTextProcessor({
+            'concurrency': args.concurrency,
+            'use_tor': not args.no_tor,
+            'network_checks': not args.skip_network_checks,
+            'metrics_snapshot_file': args.metrics_snapshot,
+            'glossary_file': args.glossary,
+            'target_langs': args.targets
+        })
 
         # تحديد مسار الملف
-        input_file = "/home/dc/Public/fml/output/document.txt"
+        input_file = args.input_file
         if not os.path.exists(input_file):
             raise FileNotFoundError(f"الملف غير موجود: {input_file}")
 
         # معالجة الملف
-        output_file = processor.process_file(input_file)
-        print(f"✅ تمت المعالجة بنجاح. الملف الناتج: {output_file}")
+        output_file = processor.process_file(input_file, resume=args.resume)
+        if isinstance(output_file, dict):
+            for target, path in output_file.items():
+                print(f"✅ تمت المعالجة بنجاح ({target}). الملف الناتج: {path}")
+        else:
+            print(f"✅ تمت المعالجة بنجاح. الملف الناتج: {output_file}")
 
     except FileNotFoundError as e:
         print(f"❌ خطأ: {str(e)}")
@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+from pdfminer.pdftypes import resolve1
+
+VERSION = 1
+
+
+def page_fingerprint(page) -> str:
+    """بصمة صفحة pdfplumber من تدفقات المحتوى وأبعادها دون تحليل التخطيط"""
+    page_obj = page.page_obj
+    digest = hashlib.sha256()
+    digest.update(repr((tuple(page_obj.mediabox), page_obj.rotate)).encode())
+    for stream in page_obj.contents:
+        stream = resolve1(stream)
+        if hasattr(stream, 'get_data'):
+            digest.update(stream.get_data())
+    return digest.hexdigest()
+
+
+class PageManifest:
+    """سجل بصمات الصفحات ونتائج استخراجها من التشغيل السابق
+
+    البيان (JSON) يحفظ بصمة كل صفحة، ونتيجة كل صفحة (النص والكتل) تُحفظ في
+    ملف مستقل داخل مجلد الصفحات، فيمكن إعادة استخدام الصفحات التي لم تتغير
+    بصمتها دون استخراجها من جديد.
+    """
+
+    def __init__(self, cache_dir: str, stem: str):
+        self.path = Path(cache_dir) / f"{stem}_manifest.json"
+        self.pages_dir = Path(cache_dir) / f"{stem}_pages"
+        self.fingerprints: Dict[str, str] = {}
+
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == VERSION:
+                    self.fingerprints = data['pages']
+            except (OSError, ValueError, KeyError):
+                # بيان تالف: تُستخرج كل الصفحات من جديد
+                self.fingerprints = {}
+
+    def page_path(self, page: int) -> Path:
+        return self.pages_dir / f"page_{page:05d}.json"
+
+    def is_current(self, page: int, fingerprint: str) -> bool:
+        """هل نتيجة الصفحة المحفوظة مطابقة لبصمتها الحالية"""
+        return self.fingerprints.get(str(page)) == fingerprint and self.page_path(page).exists()
+
+    def load(self, page: int) -> Optional[Dict]:
+        """نتيجة الصفحة المحفوظة بنفس صيغة PDFTextParser._process_page"""
+        try:
+            with open(self.page_path(page), 'r', encoding='utf-8') as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        for block in result['blocks']:
+            block['bbox'] = tuple(block['bbox'])
+        return result
+
+    def store(self, page_result: Dict, fingerprint: str):
+        """حفظ نتيجة صفحة وبصمتها"""
+        self.pages_dir.mkdir(parents=True, exist_ok=True)
+        path = self.page_path(page_result['page'])
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(page_result, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self.fingerprints[str(page_result['page'])] = fingerprint
+
+    def save(self, total_pages: int):
+        """حفظ البيان مع حذف الصفحات التي لم تعد موجودة في الملف"""
+        for page in [page for page in self.fingerprints if int(page) > total_pages]:
+            del self.fingerprints[page]
+            self.page_path(int(page)).unlink(missing_ok=True)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': VERSION, 'pages': self.fingerprints}, f, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,107 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+deep_translator_google = pytest.importorskip('deep_translator.google')
+
+from translation_backends import GoogleBackend, RateLimitError
+from translation_http import SessionPool
+
+
+class FakeGoogleHandler(BaseHTTPRequestHandler):
+    """خادم محلي بصيغة صفحة Google المختصرة مع تأخير شبكة مصطنع"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        text = parse_qs(urlparse(self.path).query).get('q', [''])[0]
+        if text.startswith('rate limited'):
+            self.send_response(429)
+            self.send_header('Retry-After', '7')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        time.sleep(0.01)
+        body = f'<div class="result-container">T({text})</div>'.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class SlowSessionPool(SessionPool):
+    """تأخير قبل تجهيز الطلب يوسّع نافذة التداخل بين الخيوط"""
+
+    def request(self, *args, **kwargs):
+        time.sleep(0.01)
+        return super().request(*args, **kwargs)
+
+
+@pytest.fixture
+def fake_google(monkeypatch):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeGoogleHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/m'
+    monkeypatch.setattr(
+        deep_translator_google.GoogleTranslator, '_base_url',
+        property(lambda self: url, lambda self, value: None),
+        raising=False
+    )
+    # route_deep_translator يستبدل وحدة requests في deep_translator؛ تُستعاد بعد الاختبار
+    monkeypatch.setattr(deep_translator_google, 'requests', deep_translator_google.requests)
+    yield
+    server.shutdown()
+    server.server_close()
+
+
+def test_concurrent_translations_keep_their_own_text(fake_google):
+    pool = SlowSessionPool(pool_maxsize=4)
+    backend = GoogleBackend('en', 'ar', http=pool)
+    segments = [f'segment number {i}' for i in range(8)]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(backend.translate, segments))
+
+    assert results == [f'T({segment})' for segment in segments]
+    pool.close()
+
+
+def test_rate_limit_carries_retry_after(fake_google):
+    pool = SessionPool()
+    backend = GoogleBackend('en', 'ar', http=pool)
+
+    with pytest.raises(RateLimitError) as error:
+        backend.translate('rate limited text')
+
+    assert error.value.retry_after == 7
+    # طلب ناجح بعده لا يحمل مدة الرد السابق
+    assert backend.translate('plain text') == 'T(plain text)'
+    assert pool.retry_after() is None
+    pool.close()
+
+
+def test_direct_session_honours_proxy_environment(monkeypatch):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeGoogleHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv('HTTP_PROXY', f'http://127.0.0.1:{server.server_address[1]}')
+    monkeypatch.delenv('NO_PROXY', raising=False)
+    monkeypatch.delenv('no_proxy', raising=False)
+    pool = SessionPool()
+
+    # المضيف غير موجود، فالرد لا يصل إلا عبر البروكسي المحدد في البيئة
+    response = pool.get('http://translate.invalid/m?q=hello')
+
+    assert response.status_code == 200
+    assert 'T(hello)' in response.text
+    assert pool.session('socks5h://127.0.0.1:9050').trust_env is False
+    pool.close()
+    server.shutdown()
+    server.server_close()
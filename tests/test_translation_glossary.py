@@ -0,0 +1,12 @@
+from translation_glossary import Glossary
+
+
+def test_find_folds_case_around_length_changing_characters():
+    # 'İ'.lower() يعطي حرفين، ويجب ألا يمنع ذلك مطابقة باقي النص دون حساسية للحالة
+    glossary = Glossary({'Elenoir': None})
+    text = 'ELENOIR is here, İstanbul too, elenoir again'
+
+    matches = glossary.find(text)
+
+    assert [text[start:end] for start, end, _ in matches] == ['ELENOIR', 'elenoir']
+    assert glossary.find('Elenoir is here, İstanbul too') == [(0, 7, 0)]
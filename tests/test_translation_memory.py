@@ -0,0 +1,28 @@
+from translation_memory import TranslationMemory
+
+PAIR = ('en', 'ar', 'stub')
+
+
+def sentence(i):
+    return f'chapter {i} opens with a long quiet walk through the northern forest'
+
+
+def test_put_keeps_at_most_max_entries(tmp_path):
+    memory = TranslationMemory(str(tmp_path / 'memory.sqlite3'), max_entries=10)
+    for i in range(50):
+        memory.put(sentence(i), *PAIR, f'T{i}')
+
+    rows = memory.conn.execute('SELECT COUNT(*) FROM memory').fetchone()[0]
+    assert rows <= 11
+    assert sum(len(index.entries) for index in memory.indexes.values()) <= 11
+    # الأحدث باقٍ والأقدم حُذف
+    assert memory.get(sentence(49), *PAIR) == 'T49'
+    assert memory.conn.execute(
+        'SELECT COUNT(*) FROM memory WHERE source = ?', (sentence(0),)
+    ).fetchone()[0] == 0
+    memory.close()
+
+    reopened = TranslationMemory(str(tmp_path / 'memory.sqlite3'), max_entries=5)
+    assert reopened.get(sentence(49), *PAIR) == 'T49'
+    assert reopened.conn.execute('SELECT COUNT(*) FROM memory').fetchone()[0] == 5
+    reopened.close()
@@ -0,0 +1,27 @@
+import asyncio
+import time
+
+from translation_backends import RateLimitError
+from translation_pipeline import AdaptivePacer, AsyncTranslationEngine
+
+
+def test_no_request_is_sent_before_retry_after_expires():
+    pacer = AdaptivePacer(initial_rate=20, max_rate=20, jitter=0)
+    sent = []
+    hold = 0.5
+
+    def translate(text):
+        sent.append((time.monotonic(), text))
+        if len(sent) == 1:
+            raise RateLimitError('429', retry_after=hold)
+        return f'T({text})'
+
+    async def run():
+        engine = AsyncTranslationEngine(translate, concurrency=4, pacer=pacer)
+        return await asyncio.gather(*(engine.translate(f'text {i}') for i in range(8)))
+
+    results = asyncio.run(run())
+
+    assert results == [f'T(text {i})' for i in range(8)]
+    rejected_at = sent[0][0]
+    assert all(at >= rejected_at + hold - 0.01 for at, _ in sent[1:])
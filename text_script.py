@@ -0,0 +1,70 @@
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+
+# نطاقات الحروف العربية في Unicode
+ARABIC_RANGES = (
+    ('\u0600', '\u06FF'),  # Arabic
+    ('\u0750', '\u077F'),  # Arabic Supplement
+    ('\u08A0', '\u08FF'),  # Arabic Extended-A
+    ('\uFB50', '\uFDFF'),  # Arabic Presentation Forms-A
+    ('\uFE70', '\uFEFF'),  # Arabic Presentation Forms-B
+)
+ARABIC_CLASS = ''.join(f'{start}-{end}' for start, end in ARABIC_RANGES)
+
+ARABIC_PATTERN = re.compile(f'[{ARABIC_CLASS}]')
+# حروف إنجليزية ومسافات فقط مع حرف واحد على الأقل
+ENGLISH_PATTERN = re.compile(r' *[A-Za-z][A-Za-z ]*')
+# أي حرف في أي لغة (ليس رقماً أو رمزاً)
+LETTER_PATTERN = re.compile(r'[^\W\d_]')
+
+# حروف كل كتابة (اللاتينية تشمل الحروف المشكّلة دون × و ÷)
+SCRIPT_CLASSES = {
+    'latin': 'A-Za-z\u00C0-\u00D6\u00D8-\u00F6\u00F8-\u024F\u1E00-\u1EFF',
+    'arabic': ARABIC_CLASS,
+    'cyrillic': '\u0400-\u04FF',
+    'greek': '\u0370-\u03FF',
+    'hebrew': '\u05D0-\u05EA',
+}
+SCRIPT_PATTERNS = {script: re.compile(f'[{chars}]') for script, chars in SCRIPT_CLASSES.items()}
+# كتابة كل لغة مصدر؛ اللغات غير المذكورة (أو auto) تقبل أي حرف
+LANGUAGE_SCRIPTS = {
+    **dict.fromkeys((
+        'en', 'fr', 'de', 'es', 'it', 'pt', 'nl', 'pl', 'tr', 'sv', 'da', 'no', 'fi',
+        'cs', 'sk', 'ro', 'hu', 'hr', 'sl', 'id', 'ms', 'vi', 'tl', 'sw', 'la'
+    ), 'latin'),
+    **dict.fromkeys(('ar', 'fa', 'ur', 'ps'), 'arabic'),
+    **dict.fromkeys(('ru', 'uk', 'bg', 'be', 'mk', 'kk'), 'cyrillic'),
+    'el': 'greek',
+    'he': 'hebrew',
+    'iw': 'hebrew',
+}
+
+
+def is_arabic(text: str) -> bool:
+    """هل يحتوي النص على حرف عربي واحد على الأقل"""
+    return ARABIC_PATTERN.search(text) is not None
+
+
+def has_language_letters(text: str, lang: str) -> bool:
+    """هل يحتوي النص على حرف من كتابة اللغة (أي حرف إذا كانت كتابتها غير معروفة)"""
+    script = LANGUAGE_SCRIPTS.get(lang.split('-')[0].lower())
+    pattern = SCRIPT_PATTERNS[script] if script else LETTER_PATTERN
+    return pattern.search(text) is not None
+
+
+def classify_text(text: str) -> str:
+    """نوع النص: arabic أو english أو number أو mixed"""
+    if ARABIC_PATTERN.search(text):
+        return 'arabic'
+    if ENGLISH_PATTERN.fullmatch(text):
+        return 'english'
+    if text.replace('.', '').isdigit():
+        return 'number'
+    return 'mixed'
+
+
+def classify_words(texts: List[str]) -> Tuple[List[str], Dict[str, int]]:
+    """تصنيف كلمات صفحة كاملة دفعة واحدة مع إرجاع عدد كل نوع"""
+    types = list(map(classify_text, texts))
+    return types, Counter(types)
@@ -0,0 +1,161 @@
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Protocol, runtime_checkable
+
+
+class RateLimitError(Exception):
+    """رفض الخادم للطلب بسبب تجاوز حد المعدل (HTTP 429)"""
+
+    def __init__(self, message: str = '', retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class NetworkSetupError(Exception):
+    """فشل إعداد الاتصال (Tor أو البروكسيات أو المترجمين)، لا فائدة من إعادة المحاولة"""
+
+
+@runtime_checkable
+class TranslationBackend(Protocol):
+    """واجهة المترجم التي يعتمد عليها المعالج"""
+
+    name: str
+    max_chars: int           # أقصى عدد أحرف في الطلب الواحد
+    requires_network: bool   # هل يحتاج إلى الشبكة (و Tor)
+    rate_limited: bool       # هل يفرض الخادم حداً لمعدل الطلبات
+
+    def translate(self, text: str) -> str:
+        ...
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        ...
+
+
+class GoogleBackend:
+    """مترجم Google عبر deep_translator
+
+    GoogleTranslator يكتب النص في قاموس معاملات مشترك قبل إرسال الطلب، فإذا
+    استُخدمت نسخة واحدة من عدة خيوط قد يُرسل خيطان النص نفسه. لذلك لكل خيط
+    نسخته الخاصة (تُنشأ عند أول طلب فيه ولا تفتح أي اتصال).
+    """
+
+    name = 'google'
+    max_chars = 5000
+    requires_network = True
+    rate_limited = True
+
+    def __init__(self, source: str, target: str, proxies: Optional[Dict] = None, timeout: int = 30, http=None):
+        from deep_translator import GoogleTranslator
+        from deep_translator.exceptions import TooManyRequests
+
+        if http is not None:
+            # اتصالات دائمة مشتركة بدلاً من اتصال جديد لكل طلب
+            from translation_http import route_deep_translator
+            route_deep_translator(http)
+
+        self.rate_limit_errors = (TooManyRequests,)
+        self.http = http
+        self.proxies = proxies
+        self.translator_class = GoogleTranslator
+        self.options = {'source': source, 'target': target, 'proxies': proxies, 'timeout': timeout}
+        self._local = threading.local()
+        # إنشاء نسخة الخيط الحالي الآن للتحقق من اللغات مبكراً
+        self.translator
+
+    @property
+    def translator(self):
+        """نسخة deep_translator الخاصة بالخيط الحالي"""
+        translator = getattr(self._local, 'translator', None)
+        if translator is None:
+            translator = self._local.translator = self.translator_class(**self.options)
+        return translator
+
+    def __getattr__(self, name):
+        # تمرير باقي الخصائص إلى مترجم deep_translator
+        if name.startswith('_') or name in ('translator_class', 'options', 'rate_limit_errors', 'http'):
+            raise AttributeError(name)
+        return getattr(self.translator, name)
+
+    def translate(self, text: str) -> str:
+        try:
+            return self.translator.translate(text)
+        except self.rate_limit_errors as e:
+            raise RateLimitError(str(e), retry_after=self.retry_after()) from e
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        try:
+            return self.translator.translate_batch(texts)
+        except self.rate_limit_errors as e:
+            raise RateLimitError(str(e), retry_after=self.retry_after()) from e
+
+    def retry_after(self) -> Optional[float]:
+        """مدة Retry-After من رد الخادم، متاحة فقط عند المرور عبر مجمع الجلسات"""
+        return self.http.retry_after() if self.http is not None else None
+
+
+class StubBackend:
+    """مترجم محلي حتمي بدون شبكة للاختبار وقياس الأداء
+
+    الأوضاع:
+    - echo: إعادة النص كما هو (مع بادئة اختيارية)
+    - dictionary: استبدال الكلمات من قاموس (dict أو ملف JSON)
+    """
+
+    name = 'stub'
+    requires_network = False
+    rate_limited = False
+
+    def __init__(self, source: str, target: str, mode: str = 'echo', prefix: str = '',
+                 dictionary=None, max_chars: int = 5000, latency: float = 0.0):
+        if mode not in ('echo', 'dictionary'):
+            raise ValueError(f"وضع غير معروف للمترجم المحلي: {mode}")
+
+        self.source = source
+        self.target = target
+        self.mode = mode
+        self.prefix = prefix
+        self.max_chars = max_chars
+        self.latency = latency
+        self.requests = 0
+
+        if isinstance(dictionary, (str, Path)):
+            with open(dictionary, 'r', encoding='utf-8') as f:
+                dictionary = json.load(f)
+        self.dictionary = {k.lower(): v for k, v in (dictionary or {}).items()}
+
+    def translate(self, text: str) -> str:
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self._translate(text)
+
+    def translate_batch(self, texts: List[str]) -> List[str]:
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return [self._translate(text) for text in texts]
+
+    def _translate(self, text: str) -> str:
+        if self.mode == 'dictionary':
+            text = re.sub(
+                r"[A-Za-z']+",
+                lambda m: self.dictionary.get(m.group().lower(), m.group()),
+                text
+            )
+        return self.prefix + text
+
+
+BACKENDS = {
+    'google': GoogleBackend,
+    'stub': StubBackend
+}
+
+
+def create_backend(name: str, source: str, target: str, **options) -> TranslationBackend:
+    """إنشاء مترجم حسب الاسم المحدد في الإعدادات"""
+    if name not in BACKENDS:
+        raise ValueError(f"مترجم غير معروف: {name}. المتاح: {', '.join(BACKENDS)}")
+    return BACKENDS[name](source, target, **options)
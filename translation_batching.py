@@ -0,0 +1,173 @@
+import re
+from typing import Callable, Iterator, List, Optional, Tuple
+
+# فاصل مرقم بين المقاطع داخل الطلب الواحد (يُضاف قبل كل مقطع عدا الأول)
+SEGMENT_SEPARATOR = '\n@@{}@@\n'
+SEPARATOR_PATTERN = re.compile(r'\s*@@\s*(\d+)\s*@@\s*')
+
+# نهاية جملة: علامة ترقيم متبوعة اختيارياً بعلامة اقتباس أو قوس إغلاق
+SENTENCE_END = re.compile(r'[.!?…:;]["”’\')\]]*$')
+# حدود الجمل داخل الفقرة الطويلة
+SENTENCE_BREAK = re.compile(r'(?<=[.!?…])\s+|(?<=[.!?…]["”’])\s+')
+# السطر الذي يبلغ هذه النسبة من أطول سطر في النص يُعتبر ملتفاً (وصل لعرض الصفحة)
+WRAP_RATIO = 0.75
+
+
+def pack_segments(segments: List[str], max_chars: int) -> List[List[int]]:
+    """تجميع فهارس المقاطع في دفعات لا يتجاوز حجمها max_chars
+
+    المقطع الأكبر من الحد يُرسل وحده في دفعة مستقلة.
+    """
+    batches = []
+    current = []
+    current_len = 0
+
+    for index, segment in enumerate(segments):
+        extra = len(segment) + (len(SEGMENT_SEPARATOR.format(len(current))) if current else 0)
+        if current and current_len + extra > max_chars:
+            batches.append(current)
+            current = []
+            current_len = 0
+            extra = len(segment)
+
+        current.append(index)
+        current_len += extra
+
+    if current:
+        batches.append(current)
+
+    return batches
+
+
+def join_batch(segments: List[str]) -> str:
+    """دمج المقاطع في نص واحد بفواصل مرقمة"""
+    parts = [segments[0]]
+    for number, segment in enumerate(segments[1:], 1):
+        parts.append(SEGMENT_SEPARATOR.format(number))
+        parts.append(segment)
+    return ''.join(parts)
+
+
+def split_batch(text: str, count: int) -> Optional[List[str]]:
+    """تقسيم الترجمة إلى مقاطعها، أو None إذا لم تتطابق الفواصل"""
+    parts = SEPARATOR_PATTERN.split(text)
+    # re.split مع مجموعة التقاط: [مقطع, رقم, مقطع, رقم, ...]
+    segments = parts[0::2]
+    numbers = parts[1::2]
+
+    if len(segments) != count or numbers != [str(n) for n in range(1, count)]:
+        return None
+
+    return [segment.strip() for segment in segments]
+
+
+def _is_wrapped(line: str, next_line: str, width: int) -> bool:
+    """هل السطر التالي تكملة لنفس الفقرة (التفاف سطور PDF)"""
+    if SENTENCE_END.search(line):
+        return False
+    # خطوط الفصل (==== أو ----) ليست جزءاً من فقرة
+    if len(set(line)) == 1 or len(set(next_line)) == 1:
+        return False
+    if next_line[0].islower():
+        return True
+    if len(line) < width * WRAP_RATIO:
+        return False
+    # الأسطر المتتالية التي تبدأ بنفس الكلمة غالباً قائمة (مثل الفهرس)
+    return line.split(None, 1)[0] != next_line.split(None, 1)[0]
+
+
+def reflow_lines(text: str) -> List[str]:
+    """دمج الأسطر الملتفة في فقرات، مع إبقاء الأسطر الفارغة والعناوين كما هي"""
+    lines = [line.strip() for line in text.split('\n')]
+    width = max(map(len, lines), default=0)
+
+    paragraphs = []
+    current = []
+    for line in lines:
+        if current and line and _is_wrapped(current[-1], line, width):
+            current.append(line)
+            continue
+        if current:
+            paragraphs.append(' '.join(current))
+        current = [line] if line else []
+        if not line:
+            paragraphs.append('')
+
+    if current:
+        paragraphs.append(' '.join(current))
+
+    return paragraphs
+
+
+def split_paragraphs(text: str, reflow: bool = True) -> List[str]:
+    """فقرات النص: بعد دمج الأسطر الملتفة، أو الأسطر كما هي"""
+    return reflow_lines(text) if reflow else text.split('\n')
+
+
+def _split_long(paragraph: str, max_chars: int) -> Iterator[str]:
+    """تقسيم فقرة أطول من الحد على حدود الجمل، ثم على المسافات عند الضرورة"""
+    for sentence in SENTENCE_BREAK.split(paragraph):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(' ', 0, max_chars + 1)
+            if cut <= 0:
+                cut = max_chars
+            yield sentence[:cut]
+            sentence = sentence[cut:].lstrip()
+        if sentence:
+            yield sentence
+
+
+def _units(paragraphs: List[str], max_chars: int,
+           isolate: Optional[Callable[[str], bool]]) -> Iterator[Tuple[str, str, bool]]:
+    """وحدات التجميع مع الفاصل الذي يسبق كل وحدة، وهل تُرسل في جزء مستقل"""
+    for paragraph in paragraphs:
+        if len(paragraph) <= max_chars:
+            yield '\n', paragraph, bool(isolate and paragraph.strip() and isolate(paragraph))
+            continue
+        separator = '\n'
+        for piece in _split_long(paragraph, max_chars):
+            yield separator, piece, False
+            separator = ' '
+
+
+def _append_chunk(chunks: List[str], parts: List[str]):
+    # الأسطر الفارغة وحدها لا تُرسل للترجمة ولا تُعتبر جزءاً
+    chunk = ''.join(parts)
+    if chunk.strip():
+        chunks.append(chunk)
+
+
+def chunk_text(text: str, max_chars: int, reflow: bool = True,
+               isolate: Optional[Callable[[str], bool]] = None) -> List[str]:
+    """تقسيم النص إلى أجزاء لا يتجاوز كل منها max_chars
+
+    يُحسب الطول تراكمياً (زمن خطي)، والقطع يكون بين الفقرات أولاً ثم بين الجمل.
+    الفقرات التي يحددها isolate (مثل المتكررة في الملف) تُوضع في أجزاء مستقلة
+    لكي تُترجم مرة واحدة ويُعاد استخدام ترجمتها.
+    """
+    paragraphs = split_paragraphs(text, reflow)
+
+    chunks = []
+    current = []
+    current_len = 0
+    for separator, unit, isolated in _units(paragraphs, max_chars, isolate):
+        extra = len(unit) + (len(separator) if current else 0)
+        if current and (isolated or current_len + extra > max_chars):
+            _append_chunk(chunks, current)
+            current = []
+            current_len = 0
+            extra = len(unit)
+
+        if isolated:
+            chunks.append(unit)
+            continue
+
+        if current:
+            current.append(separator)
+        current.append(unit)
+        current_len += extra
+
+    if current:
+        _append_chunk(chunks, current)
+
+    return chunks
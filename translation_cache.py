@@ -0,0 +1,107 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class TranslationCache:
+    """ذاكرة مؤقتة دائمة للترجمات معنونة بالمحتوى (SQLite) مع إزالة LRU"""
+
+    def __init__(self, db_path: str, max_entries: int = 200000):
+        self.db_path = Path(db_path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                key TEXT PRIMARY KEY,
+                translated TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self.conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations(last_used)'
+        )
+        self.conn.commit()
+        self.entries = self.conn.execute('SELECT COUNT(*) FROM translations').fetchone()[0]
+
+        logging.info(f"تم فتح ذاكرة الترجمة المؤقتة: {self.db_path} ({self.entries} مدخل)")
+
+    @staticmethod
+    def make_key(text: str, source: str, target: str, backend: str) -> str:
+        """إنشاء مفتاح من بصمة النص واللغتين والمترجم"""
+        payload = '\x1f'.join((backend, source, target, text))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, text: str, source: str, target: str, backend: str) -> Optional[str]:
+        """البحث عن ترجمة محفوظة"""
+        key = self.make_key(text, source, target, backend)
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT translated FROM translations WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self.conn.execute(
+                'UPDATE translations SET last_used = ? WHERE key = ?', (time.time(), key)
+            )
+            self.conn.commit()
+            return row[0]
+
+    def put(self, text: str, source: str, target: str, backend: str, translated: str):
+        """حفظ ترجمة جديدة مع إزالة الأقدم استخداماً عند تجاوز الحد"""
+        key = self.make_key(text, source, target, backend)
+        with self._lock:
+            exists = self.conn.execute(
+                'SELECT 1 FROM translations WHERE key = ?', (key,)
+            ).fetchone()
+            self.conn.execute(
+                'INSERT OR REPLACE INTO translations (key, translated, last_used) VALUES (?, ?, ?)',
+                (key, translated, time.time())
+            )
+            if not exists:
+                self.entries += 1
+                if self.entries > self.max_entries:
+                    self._evict(self.entries - self.max_entries)
+            self.conn.commit()
+
+    def _evict(self, count: int):
+        """إزالة المدخلات الأقل استخداماً مؤخراً"""
+        self.conn.execute("""
+            DELETE FROM translations WHERE key IN (
+                SELECT key FROM translations ORDER BY last_used ASC LIMIT ?
+            )
+        """, (count,))
+        self.entries -= count
+        self.evictions += count
+
+    def stats(self) -> Dict:
+        """إحصائيات الذاكرة المؤقتة"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': self.entries,
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def close(self):
+        """إغلاق قاعدة البيانات"""
+        with self._lock:
+            self.conn.commit()
+            self.conn.close()
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+class TranslationCheckpoint:
+    """سجل جانبي لتقدم الترجمة يسمح باستئناف العمل بعد الانقطاع"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.input_file: Optional[str] = None
+        self.output_file: Optional[str] = None
+        self.start_offset = 0
+        self.records: List[Dict] = []
+        self.completed = False
+        # أول صفحة لم تكتمل ترجمتها في هذا التشغيل (لا تُسجل بعدها أي صفحة)
+        self.incomplete_page: Optional[int] = None
+
+    @staticmethod
+    def page_hash(text: str) -> str:
+        """بصمة نص الصفحة المصدر"""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    @property
+    def completed_pages(self):
+        return {record['index'] for record in self.records}
+
+    def load(self) -> bool:
+        """قراءة السجل من القرص (يتجاهل السطر الأخير إذا كان مقطوعاً)"""
+        if not self.path.exists():
+            return False
+
+        self.records = []
+        self.completed = False
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logging.warning(f"تم تجاهل سطر تالف في سجل التقدم: {self.path}")
+                    break
+
+                if record['type'] == 'start':
+                    self.input_file = record.get('input')
+                    self.output_file = record['output']
+                    self.start_offset = record['offset']
+                elif record['type'] == 'page':
+                    self.records.append(record)
+                elif record['type'] == 'done':
+                    self.completed = True
+
+        return self.output_file is not None
+
+    def start(self, input_file: str, output_file: str, offset: int):
+        """بدء سجل جديد لملف ناتج جديد"""
+        self.input_file = input_file
+        self.output_file = output_file
+        self.start_offset = offset
+        self.records = []
+        self.completed = False
+        self._rewrite()
+
+    def validate(self, pages: Iterable[str]) -> int:
+        """التحقق من تطابق الصفحات المكتملة مع المصدر وإرجاع موضع الاستئناف في الملف الناتج
+
+        pages نصوص صفحات المصدر بالترتيب (يكفي أن تكون مولداً يُقرأ مرة واحدة).
+        """
+        valid = []
+        records = iter(self.records)
+        record = next(records, None)
+        for index, text in enumerate(pages):
+            if record is None:
+                break
+            if index < record['index']:
+                continue
+            if self.page_hash(text) != record['hash']:
+                break
+            valid.append(record)
+            record = next(records, None)
+
+        if record is not None:
+            logging.warning(f"تغير مصدر الصفحة {record['index']}، سيتم استئناف الترجمة منها")
+
+        if len(valid) != len(self.records):
+            self.records = valid
+            self._rewrite()
+
+        return valid[-1]['offset'] if valid else self.start_offset
+
+    def stop_recording(self, page: int):
+        """إيقاف التسجيل عند صفحة فشلت ترجمتها
+
+        الصفحات المسجلة يجب أن تكون متتالية لأن الاستئناف يقطع الملف الناتج بعد آخرها،
+        لذلك لا تُسجل هذه الصفحة ولا ما بعدها ولا يُسجل اكتمال الملف، فيستأنف --resume منها.
+        """
+        if self.incomplete_page is None:
+            self.incomplete_page = page
+            logging.warning(f"فشلت ترجمة أجزاء من الصفحة {page}، سيُستأنف منها عند التشغيل بـ --resume")
+
+    def record_page(self, index: int, text: str, offset: int):
+        """تسجيل اكتمال صفحة مع موضع نهايتها في الملف الناتج"""
+        if self.incomplete_page is not None:
+            return
+        record = {'type': 'page', 'index': index, 'offset': offset, 'hash': self.page_hash(text)}
+        self.records.append(record)
+        self._append(record)
+
+    def finish(self):
+        """تسجيل اكتمال الملف (إلا إذا بقيت صفحات لم تكتمل ترجمتها)"""
+        if self.incomplete_page is not None:
+            logging.warning(f"الترجمة غير مكتملة بدءاً من الصفحة {self.incomplete_page}: {self.output_file}")
+            return
+        self.completed = True
+        self._append({'type': 'done'})
+
+    def _append(self, record: Dict):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _rewrite(self):
+        start = {
+            'type': 'start',
+            'input': self.input_file,
+            'output': self.output_file,
+            'offset': self.start_offset
+        }
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in [start] + self.records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import re
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+# يتغير عند تغيير بنية الآلة حتى لا تُحمّل نسخ قديمة من الذاكرة المؤقتة
+VERSION = 3
+# مفتاح الانتقال في قاموس واحد: رقم العقدة * BASE + رمز الحرف
+BASE = 0x110000
+# مفتاح الترجمة الثابتة الصالحة لكل اللغات
+ANY_LANG = '*'
+# عمود ترجمة بلغة محددة في ملف TSV، مثل fr=Dicathen
+LANG_COLUMN = re.compile(r'^([a-z]{2,3}(?:-[A-Za-z]+)?)=(.*)$')
+
+# المصطلح -> None (يُحمى كما هو) أو ترجمة ثابتة أو قاموس {اللغة: الترجمة}
+Rendering = Union[None, str, Dict[str, str]]
+
+
+class Glossary:
+    """مسرد مصطلحات (أسماء أعلام وغيرها) تُحمى من الترجمة أو تُستبدل بترجمة ثابتة
+
+    البحث بآلة Aho-Corasick تُبنى مرة واحدة: مرور خطي واحد على النص مهما كان
+    عدد المصطلحات. المطابقة دون حساسية لحالة الأحرف وعلى حدود الكلمات، وعند
+    التداخل يُختار الأسبق ثم الأطول.
+
+    الترجمات الثابتة خاصة بلغة هدف: الترجمة النصية المفردة تُنسب إلى lang (أو
+    لكل اللغات إذا لم تُحدد)، وفي اللغات الأخرى يُنقل المصطلح كما هو.
+    """
+
+    def __init__(self, terms: Dict[str, Rendering], lang: Optional[str] = None):
+        self.terms: List[str] = []
+        self.renderings: List[Dict[str, str]] = []
+        self.goto: Dict[int, int] = {}
+        self.fail = array('I', [0])
+        self.dict_link = array('I', [0])
+        # العقدة -> رقم المصطلح المنتهي عندها
+        self.output: Dict[int, int] = {}
+        self._build(terms, lang)
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def _build(self, terms: Dict[str, Rendering], lang: Optional[str]):
+        children = [[]]
+        for term, rendering in terms.items():
+            term = term.strip()
+            if not term:
+                continue
+            if isinstance(rendering, str):
+                rendering = {lang or ANY_LANG: rendering}
+            rendering = {key: value for key, value in (rendering or {}).items() if value}
+
+            node = 0
+            for char in self._fold(term):
+                key = node * BASE + ord(char)
+                child = self.goto.get(key)
+                if child is None:
+                    child = len(children)
+                    self.goto[key] = child
+                    children.append([])
+                    children[node].append((ord(char), child))
+                node = child
+
+            if node in self.output:
+                # مصطلح مكرر (بعد توحيد الحالة): تُدمج ترجماته، والأخير يحل محل السابق للغة نفسها
+                self.renderings[self.output[node]].update(rendering)
+                continue
+            self.output[node] = len(self.terms)
+            self.terms.append(term)
+            self.renderings.append(rendering)
+
+        # روابط الفشل وروابط المخرجات بترتيب العرض (BFS)
+        self.fail = array('I', [0]) * len(children)
+        self.dict_link = array('I', [0]) * len(children)
+        queue = [child for _, child in children[0]]
+        for node in queue:
+            for code, child in children[node]:
+                fallback = self.fail[node]
+                while fallback and fallback * BASE + code not in self.goto:
+                    fallback = self.fail[fallback]
+                target = self.goto.get(fallback * BASE + code, 0)
+                if target == child:
+                    target = 0
+                self.fail[child] = target
+                self.dict_link[child] = target if target in self.output else self.dict_link[target]
+                queue.append(child)
+
+    @staticmethod
+    def _fold(text: str) -> str:
+        """أحرف صغيرة مع الحفاظ على طول النص (مواضع المطابقة تُستخدم في النص الأصلي)
+
+        الحرف الذي يتغير طوله عند التصغير (مثل İ) يبقى كما هو وحده دون باقي النص.
+        """
+        folded = text.lower()
+        if len(folded) == len(text):
+            # التصغير لا يقصّر أي حرف، فتساوي الطول يعني أن كل حرف بقي حرفاً واحداً
+            return folded
+        return ''.join(lower if len(lower := char.lower()) == 1 else char for char in text)
+
+    def find(self, text: str) -> List[Tuple[int, int, int]]:
+        """المصطلحات في النص كـ (البداية، النهاية، رقم المصطلح) دون تداخل وبالترتيب"""
+        goto, fail, dict_link, output = self.goto, self.fail, self.dict_link, self.output
+        matches = []
+        node = 0
+        for end, char in enumerate(self._fold(text), 1):
+            code = ord(char)
+            while node and node * BASE + code not in goto:
+                node = fail[node]
+            node = goto.get(node * BASE + code, 0)
+
+            match = node if node in output else dict_link[node]
+            while match:
+                term = output[match]
+                matches.append((end - len(self.terms[term]), end, term))
+                match = dict_link[match]
+
+        if not matches:
+            return []
+
+        # الأسبق ثم الأطول، مع استبعاد ما يقع داخل كلمة أو يتداخل مع مطابقة مختارة
+        matches.sort(key=lambda match: (match[0], match[0] - match[1]))
+        selected = []
+        position = 0
+        for start, end, term in matches:
+            if start < position:
+                continue
+            if start > 0 and self._is_word_char(text[start - 1]):
+                continue
+            if end < len(text) and self._is_word_char(text[end]):
+                continue
+            selected.append((start, end, term))
+            position = end
+        return selected
+
+    @staticmethod
+    def _is_word_char(char: str) -> bool:
+        return char.isalnum() or char == '_'
+
+    def rendering(self, term: int, original: str, lang: Optional[str] = None) -> str:
+        """النص الذي يحل محل المصطلح في الترجمة إلى lang: الترجمة الثابتة أو المصطلح كما هو"""
+        renderings = self.renderings[term]
+        return renderings.get(lang) or renderings.get(ANY_LANG) or original
+
+    @staticmethod
+    def read_terms(path: str) -> Dict[str, Rendering]:
+        """قراءة ملف المسرد
+
+        JSON: قاموس {المصطلح: الترجمة أو {اللغة: الترجمة} أو null} أو قائمة مصطلحات.
+        غير ذلك: سطر لكل مصطلح، والترجمة الثابتة (اختيارية) بعد علامة جدولة، إما
+        نصاً واحداً أو أعمدة بلغاتها (ar=ديكاثن<TAB>fr=Dicathen).
+        الأسطر الفارغة أو التي تبدأ بـ # تُتجاهل.
+        """
+        path = Path(path)
+        if path.suffix.lower() == '.json':
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return dict.fromkeys(data) if isinstance(data, list) else data
+
+        terms = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.rstrip('\n')
+                if not line.strip() or line.lstrip().startswith('#'):
+                    continue
+                term, *columns = line.split('\t')
+                columns = [column.strip() for column in columns if column.strip()]
+                matches = [LANG_COLUMN.match(column) for column in columns]
+                if columns and all(matches):
+                    terms[term.strip()] = {match.group(1): match.group(2).strip() for match in matches}
+                else:
+                    terms[term.strip()] = columns[0] if columns else None
+        return terms
+
+    @classmethod
+    def load(cls, path: str, cache_dir: Optional[str] = None, lang: Optional[str] = None) -> 'Glossary':
+        """تحميل المسرد، مع حفظ الآلة المبنية على القرص وإعادة استخدامها ما لم يتغير الملف
+
+        lang اللغة التي تُنسب إليها الترجمات الثابتة المكتوبة دون لغة.
+        """
+        digest = hashlib.sha256(Path(path).read_bytes() + f'v{VERSION}:{lang}'.encode()).hexdigest()[:16]
+        cache_path = Path(cache_dir) / f"glossary_{digest}.pickle" if cache_dir else None
+
+        if cache_path and cache_path.exists():
+            try:
+                with open(cache_path, 'rb') as f:
+                    glossary = pickle.load(f)
+                logging.info(f"تم تحميل المسرد من الذاكرة المؤقتة: {cache_path} ({len(glossary)} مصطلح)")
+                return glossary
+            except Exception as e:
+                logging.warning(f"فشل تحميل المسرد من الذاكرة المؤقتة، سيعاد بناؤه: {str(e)}")
+
+        glossary = cls(cls.read_terms(path), lang)
+        logging.info(f"تم بناء المسرد: {path} ({len(glossary)} مصطلح)")
+
+        if cache_path:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix('.tmp')
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(glossary, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        return glossary
@@ -0,0 +1,204 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# مهلة افتراضية للطلبات التي لا تحدد مهلة (deep_translator لا يمررها)
+DEFAULT_TIMEOUT = 30
+
+
+def proxy_url(proxies: Union[Dict, str, None]) -> Optional[str]:
+    """عنوان البروكسي من قاموس proxies بصيغة requests أو من نص"""
+    if isinstance(proxies, dict):
+        return proxies.get('https') or proxies.get('http')
+    return proxies or None
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """ثوانٍ الانتظار من ترويسة Retry-After (عدد ثوانٍ أو تاريخ HTTP)، أو None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
+
+
+class SessionPool:
+    """جلسات HTTP دائمة (keep-alive) مشتركة، جلسة واحدة لكل بروكسي
+
+    كل جلسة تحتفظ باتصالاتها مفتوحة (TLS وعبر SOCKS) لإعادة استخدامها بين
+    الطلبات، والهيدرز تُضبط مرة واحدة عند إنشاء الجلسة أو عند تدويرها.
+    الإحصائيات: نسبة إعادة استخدام الاتصالات وزمن الطلبات مع اتصال جديد وبدونه.
+    """
+
+    def __init__(self, pool_maxsize: int = 10, timeout: float = DEFAULT_TIMEOUT, headers: Optional[Dict] = None):
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.headers = dict(headers or {})
+        self.sessions: Dict[Optional[str], requests.Session] = {}
+        self.requests = 0
+        self.new_connections = 0
+        self.errors = 0
+        self.new_connection_seconds = 0.0
+        self.reused_seconds = 0.0
+        self.requests_on_new_connection = 0
+        self._lock = threading.Lock()
+        # Retry-After لآخر رد 429 في كل خيط (المترجم يقرؤه بعد أن يرفع استثناءه)
+        self._local = threading.local()
+
+    def session(self, proxies: Union[Dict, str, None] = None) -> requests.Session:
+        """الجلسة الخاصة بالبروكسي، تُنشأ عند أول استخدام"""
+        key = proxy_url(proxies)
+        with self._lock:
+            session = self.sessions.get(key)
+            if session is None:
+                session = requests.Session()
+                session.headers.update(self.headers)
+                if key:
+                    # جلسات البروكسي الصريح (Tor) لا تتأثر بـ HTTP(S)_PROXY و NO_PROXY في البيئة،
+                    # أما الجلسة المباشرة فتحترمها كما يفعل requests و deep_translator افتراضياً
+                    session.trust_env = False
+                    session.proxies = {'http': key, 'https': key}
+                # إعادة المحاولة يتولاها المعالج، لذا بدون محاولات على مستوى الاتصال
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_maxsize, max_retries=0)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self.sessions[key] = session
+                logging.info(f"جلسة HTTP جديدة (بروكسي: {key or 'مباشر'})")
+            return session
+
+    def update_headers(self, headers: Dict):
+        """تدوير الهيدرز في كل الجلسات الحالية والمستقبلية"""
+        with self._lock:
+            self.headers = dict(headers)
+            for session in self.sessions.values():
+                session.headers.update(self.headers)
+
+    def request(self, method: str, url: str, proxies: Union[Dict, str, None] = None, **kwargs) -> requests.Response:
+        """إرسال طلب عبر الجلسة المناسبة مع تسجيل إعادة استخدام الاتصال وزمنه"""
+        session = self.session(proxies)
+        kwargs.setdefault('timeout', self.timeout)
+
+        connections = self._connections(session)
+        start = time.perf_counter()
+        try:
+            response = session.request(method, url, **kwargs)
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        elapsed = time.perf_counter() - start
+        opened = self._connections(session) - connections
+        self._local.retry_after = (
+            parse_retry_after(response.headers.get('Retry-After')) if response.status_code == 429 else None
+        )
+
+        with self._lock:
+            self.requests += 1
+            if opened > 0:
+                self.new_connections += opened
+                self.requests_on_new_connection += 1
+                self.new_connection_seconds += elapsed
+            else:
+                self.reused_seconds += elapsed
+        return response
+
+    def retry_after(self) -> Optional[float]:
+        """مدة Retry-After من آخر رد 429 في الخيط الحالي (None إن لم توجد)"""
+        return getattr(self._local, 'retry_after', None)
+
+    def get(self, url: str, proxies: Union[Dict, str, None] = None, **kwargs) -> requests.Response:
+        return self.request('GET', url, proxies=proxies, **kwargs)
+
+    @staticmethod
+    def _connections(session: requests.Session) -> int:
+        """عدد الاتصالات التي فتحتها الجلسة حتى الآن (من عدادات urllib3)"""
+        total = 0
+        for adapter in {id(adapter): adapter for adapter in session.adapters.values()}.values():
+            managers = [adapter.poolmanager, *adapter.proxy_manager.values()]
+            for manager in managers:
+                if manager is None:
+                    continue
+                for key in list(manager.pools.keys()):
+                    pool = manager.pools.get(key)
+                    if pool is not None:
+                        total += pool.num_connections
+        return total
+
+    def stats(self) -> Dict:
+        """إحصائيات الاتصالات"""
+        with self._lock:
+            reused = self.requests - self.requests_on_new_connection
+            new_mean = self.new_connection_seconds / self.requests_on_new_connection if self.requests_on_new_connection else 0
+            reused_mean = self.reused_seconds / reused if reused else 0
+            return {
+                'sessions': len(self.sessions),
+                'requests': self.requests,
+                'errors': self.errors,
+                'new_connections': self.new_connections,
+                'reuse_rate': round(reused / self.requests, 4) if self.requests else 0.0,
+                'mean_seconds_new_connection': round(new_mean, 4),
+                'mean_seconds_reused_connection': round(reused_mean, 4),
+                # الفرق بين المتوسطين تقدير لزمن إنشاء الاتصال (TCP و SOCKS و TLS)
+                'estimated_connect_seconds': round(max(0.0, new_mean - reused_mean), 4) if reused else None
+            }
+
+    def close(self):
+        with self._lock:
+            for session in self.sessions.values():
+                session.close()
+            self.sessions = {}
+
+
+class _RequestsRouter:
+    """بديل لوحدة requests داخل deep_translator يمرر طلباته عبر جلسات المجمع
+
+    deep_translator يستدعي requests.get مباشرة (بدون جلسة ولا مهلة)، فيفتح اتصالاً
+    جديداً مع كل ترجمة. باقي خصائص الوحدة (الاستثناءات وغيرها) تُمرر كما هي.
+    """
+
+    def __init__(self, pool: SessionPool):
+        self.pool = pool
+
+    def get(self, url, params=None, proxies=None, **kwargs):
+        return self.pool.get(url, proxies=proxies, params=params, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(requests, name)
+
+
+_shared_pool = None
+_shared_pool_lock = threading.Lock()
+
+
+def shared_pool(**options) -> SessionPool:
+    """مجمع الجلسات المشترك في العملية (الخيارات تُطبق عند أول إنشاء فقط)"""
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = SessionPool(**options)
+        return _shared_pool
+
+
+def route_deep_translator(pool: SessionPool):
+    """توجيه طلبات مترجم Google في deep_translator عبر مجمع الجلسات
+
+    الطلبات بلا بروكسي صريح تمر بالجلسة المباشرة التي تبقى تحترم HTTP(S)_PROXY
+    في البيئة، فلا يتغير سلوك deep_translator لمن يعتمد عليها.
+    """
+    import deep_translator.google as google_module
+
+    if not isinstance(google_module.requests, _RequestsRouter) or google_module.requests.pool is not pool:
+        google_module.requests = _RequestsRouter(pool)
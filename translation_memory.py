@@ -0,0 +1,281 @@
+import difflib
+import logging
+import random
+import re
+import sqlite3
+import threading
+import zlib
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # التوقيع يُحسب بنفس النتيجة دون numpy لكن أبطأ
+    np = None
+
+# MinHash بـ NUM_PERM تبديلاً مقسمة إلى BANDS حزمة من ROWS صفوف (LSH):
+# المقاطع بتشابه 0.7 تصبح مرشحة باحتمال ~98%، وبتشابه 0.3 باحتمال ~24%
+NUM_PERM = 30
+BANDS = 10
+ROWS = 3
+_rng = random.Random(1)
+PERMUTATIONS = [(_rng.randrange(1, 1 << 32) | 1, _rng.randrange(1 << 32)) for _ in range(NUM_PERM)]
+if np is not None:
+    PERM_A = np.array([a for a, _ in PERMUTATIONS], dtype=np.uint64)[:, None]
+    PERM_B = np.array([b for _, b in PERMUTATIONS], dtype=np.uint64)[:, None]
+
+# أقل عدد كلمات للبحث التقريبي (المقاطع القصيرة يغيّر معناها أي اختلاف)
+MIN_TOKENS = 6
+# أقصى عدد مرشحين يُتحقق من تشابههم الفعلي لكل بحث
+MAX_CANDIDATES = 20
+# الزيادة المسموحة فوق max_entries قبل حذف الأقدم وإعادة بناء الفهرس دفعة واحدة
+PRUNE_SLACK = 0.1
+
+WORD_REGEX = re.compile(r'\w+')
+# كلمة مقسومة بواصلة في نهاية السطر كما تخرج من PDF
+HYPHEN_BREAK = re.compile(r'(\w)-\s+(\w)')
+
+
+def tokenize(text: str) -> List[str]:
+    """كلمات النص بعد دمج الكلمات المقسومة بواصلة (علامات الترقيم لا تُحتسب)"""
+    return WORD_REGEX.findall(HYPHEN_BREAK.sub(r'\1\2', text))
+
+
+def is_name_like(token: str) -> bool:
+    """كلمة تبدو اسماً أو رمزاً ينقله المترجم عادة كما هو"""
+    return token[0].isupper() or any(char.isdigit() for char in token)
+
+
+def shingles(tokens: List[str]) -> set:
+    """أزواج الكلمات المتتالية (بأحرف صغيرة) كوحدات للمقارنة"""
+    words = [token.lower() for token in tokens]
+    return {f"{first} {second}" for first, second in zip(words, words[1:])}
+
+
+def minhash(features: set) -> List[int]:
+    """توقيع MinHash بقيم 32 بت (نفس القيم مع numpy أو بدونها)"""
+    hashes = [zlib.crc32(feature.encode('utf-8')) for feature in features]
+    if np is not None:
+        values = (PERM_A * np.array(hashes, dtype=np.uint64) + PERM_B) >> np.uint64(16)
+        return (values & np.uint64(0xFFFFFFFF)).min(axis=1).tolist()
+    return [min([((a * h + b) >> 16) & 0xFFFFFFFF for h in hashes]) for a, b in PERMUTATIONS]
+
+
+class _Entry:
+    """مقطع مفهرس؛ كلماته تُحسب عند أول مقارنة فقط"""
+    __slots__ = ('source', 'translated', '_tokens', '_shingles')
+
+    def __init__(self, source: str, translated: str):
+        self.source = source
+        self.translated = translated
+        self._tokens = None
+        self._shingles = None
+
+    @property
+    def tokens(self) -> List[str]:
+        if self._tokens is None:
+            self._tokens = tokenize(self.source)
+        return self._tokens
+
+    @property
+    def shingles(self) -> set:
+        if self._shingles is None:
+            self._shingles = shingles(self.tokens)
+        return self._shingles
+
+
+class _Index:
+    """فهرس LSH في الذاكرة لزوج لغات ومترجم واحد"""
+
+    def __init__(self):
+        self.entries: List[_Entry] = []
+        self.sources: Dict[str, int] = {}
+        self.bands: Dict[Tuple, List[int]] = {}
+
+    def add(self, source: str, translated: str, signature: List[int]):
+        if source in self.sources:
+            self.entries[self.sources[source]].translated = translated
+            return
+
+        entry_id = len(self.entries)
+        self.entries.append(_Entry(source, translated))
+        self.sources[source] = entry_id
+        for band in self.band_keys(signature):
+            self.bands.setdefault(band, []).append(entry_id)
+
+    @staticmethod
+    def band_keys(signature: List[int]):
+        for band in range(BANDS):
+            yield (band, *signature[band * ROWS:(band + 1) * ROWS])
+
+    def candidates(self, signature: List[int]) -> List[int]:
+        """المدخلات التي تشترك مع النص في حزمة واحدة على الأقل، الأكثر اشتراكاً أولاً"""
+        hits = {}
+        for band in self.band_keys(signature):
+            for entry_id in self.bands.get(band, ()):
+                hits[entry_id] = hits.get(entry_id, 0) + 1
+        return sorted(hits, key=hits.get, reverse=True)[:MAX_CANDIDATES]
+
+
+class TranslationMemory:
+    """ذاكرة ترجمة تقريبية للمقاطع شبه المتطابقة (MinHash + LSH) محفوظة في SQLite
+
+    تكمل TranslationCache: عند عدم وجود تطابق تام يُبحث عن مقطع مترجم سابقاً
+    بتشابه (Jaccard على أزواج الكلمات) لا يقل عن threshold. تُعاد ترجمته فقط إذا
+    كانت الفروق شكلية (حالة الأحرف، الترقيم، الواصلة) أو كلمات نُقلت كما هي إلى
+    الترجمة (أسماء أو رموز لاتينية) فتُستبدل فيها. أي فرق آخر يعني طلب ترجمة.
+    """
+
+    def __init__(self, db_path: str, threshold: float = 0.7, max_entries: int = 100000):
+        """max_entries أقصى عدد مقاطع لكل زوج لغات ومترجم؛ الأقدم إضافةً يُحذف أولاً"""
+        self.db_path = Path(db_path)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.indexes: Dict[Tuple[str, str, str], _Index] = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        # التوقيع محفوظ مع المقطع حتى لا يُعاد حسابه عند بناء الفهرس
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS memory (
+                source_lang TEXT NOT NULL,
+                target_lang TEXT NOT NULL,
+                backend TEXT NOT NULL,
+                source TEXT NOT NULL,
+                translated TEXT NOT NULL,
+                signature BLOB NOT NULL,
+                PRIMARY KEY (source_lang, target_lang, backend, source)
+            )
+        """)
+        self.conn.commit()
+
+        logging.info(f"تم فتح ذاكرة الترجمة التقريبية: {self.db_path}")
+
+    def _index(self, source: str, target: str, backend: str) -> _Index:
+        """فهرس زوج اللغات والمترجم، يُبنى من قاعدة البيانات عند أول استخدام"""
+        key = (source, target, backend)
+        if key not in self.indexes:
+            index = _Index()
+            rows = self.conn.execute(
+                'SELECT source, translated, signature FROM memory '
+                'WHERE source_lang = ? AND target_lang = ? AND backend = ? ORDER BY rowid DESC LIMIT ?',
+                (source, target, backend, self.max_entries)
+            )
+            for text, translated, signature in rows:
+                index.add(text, translated, array('I', signature).tolist())
+            if len(index.entries) >= self.max_entries:
+                # صفوف زائدة من تشغيلات سابقة لم تُحمّل في الفهرس
+                self._prune(key)
+            self.indexes[key] = index
+        return self.indexes[key]
+
+    def _prune(self, key: Tuple[str, str, str]) -> int:
+        """حذف أقدم المقاطع لزوج اللغات والمترجم بحيث لا يتجاوز عددها max_entries"""
+        cursor = self.conn.execute(
+            'DELETE FROM memory WHERE source_lang = ? AND target_lang = ? AND backend = ? AND rowid NOT IN ('
+            'SELECT rowid FROM memory WHERE source_lang = ? AND target_lang = ? AND backend = ? '
+            'ORDER BY rowid DESC LIMIT ?)',
+            (*key, *key, self.max_entries)
+        )
+        self.conn.commit()
+        return cursor.rowcount
+
+    def get(self, text: str, source: str, target: str, backend: str) -> Optional[str]:
+        """ترجمة مقطع شبه مطابق بعد تعديلها للنص الجديد، أو None"""
+        tokens = tokenize(text)
+        if len(tokens) < MIN_TOKENS:
+            return None
+
+        features = shingles(tokens)
+        signature = minhash(features)
+        with self._lock:
+            index = self._index(source, target, backend)
+            for entry_id in index.candidates(signature):
+                entry = index.entries[entry_id]
+                union = len(features | entry.shingles)
+                if not union or len(features & entry.shingles) / union < self.threshold:
+                    continue
+
+                translated = self.adapt(entry, tokens)
+                if translated is not None:
+                    self.hits += 1
+                    return translated
+
+            self.misses += 1
+            return None
+
+    @staticmethod
+    def adapt(entry: _Entry, tokens: List[str]) -> Optional[str]:
+        """تعديل الترجمة المحفوظة لتطابق النص الجديد، أو None إذا لم يكن ذلك آمناً"""
+        translated = entry.translated
+        old_words = [token.lower() for token in entry.tokens]
+        matcher = difflib.SequenceMatcher(None, old_words, [token.lower() for token in tokens], autojunk=False)
+
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                continue
+            # كلمات مضافة أو محذوفة تغير المعنى
+            if tag != 'replace' or i2 - i1 != j2 - j1:
+                return None
+
+            for old, new in zip(entry.tokens[i1:i2], tokens[j1:j2]):
+                # علامات النصوص المحمية مرقمة محلياً ويجب أن تتطابق
+                if old.upper().startswith('PRESERVED_') or new.upper().startswith('PRESERVED_'):
+                    return None
+                # تُستبدل فقط الأسماء والرموز (حرف أول كبير أو أرقام)، لا الكلمات العادية
+                if not (is_name_like(old) and is_name_like(new)):
+                    return None
+                # الكلمة يجب أن تكون منقولة كما هي في الترجمة ومرة واحدة في المصدر
+                pattern = re.compile(rf'(?<!\w){re.escape(old)}(?!\w)')
+                if old_words.count(old.lower()) != 1 or not pattern.search(translated):
+                    return None
+                translated = pattern.sub(lambda _: new, translated)
+
+        return translated
+
+    def put(self, text: str, source: str, target: str, backend: str, translated: str):
+        """إضافة مقطع مترجم إلى الفهرس وقاعدة البيانات"""
+        tokens = tokenize(text)
+        if len(tokens) < MIN_TOKENS:
+            return
+
+        signature = minhash(shingles(tokens))
+        key = (source, target, backend)
+        with self._lock:
+            index = self._index(*key)
+            index.add(text, translated, signature)
+            # الاستبدال يعطي الصف رقماً جديداً، فترتيب rowid هو ترتيب آخر استخدام
+            self.conn.execute(
+                'INSERT OR REPLACE INTO memory (source_lang, target_lang, backend, source, translated, signature) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (source, target, backend, text, translated, array('I', signature).tobytes())
+            )
+            self.conn.commit()
+
+            if len(index.entries) > self.max_entries * (1 + PRUNE_SLACK):
+                removed = self._prune(key)
+                # يُعاد بناء الفهرس من المقاطع الباقية عند البحث التالي
+                del self.indexes[key]
+                logging.info(f"ذاكرة الترجمة التقريبية: حذف {removed} مقطعاً قديماً")
+
+    def stats(self) -> Dict:
+        """إحصائيات الذاكرة التقريبية"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': sum(len(index.entries) for index in self.indexes.values()),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def close(self):
+        """إغلاق قاعدة البيانات"""
+        with self._lock:
+            self.conn.commit()
+            self.conn.close()
@@ -0,0 +1,124 @@
+import json
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# حدود فئات مدرج زمن التنفيذ بالثواني (الفئة الأخيرة لكل ما يزيد عنها)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60)
+
+
+class LatencyHistogram:
+    """مدرج زمن التنفيذ لمرحلة واحدة: العدد والمجموع والحدود وتوزيع الفئات"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def summary(self) -> Dict:
+        labels = [f"<={bound}s" for bound in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}s"]
+        return {
+            'count': self.count,
+            'total_seconds': round(self.total, 6),
+            'mean_seconds': round(self.total / self.count, 6) if self.count else 0,
+            'min_seconds': round(self.min or 0, 6),
+            'max_seconds': round(self.max, 6),
+            'buckets': {label: n for label, n in zip(labels, self.buckets) if n}
+        }
+
+
+class PipelineMetrics:
+    """عدادات ومدرجات زمنية لمراحل خط الترجمة
+
+    المراحل تُقاس بـ timer() والعدادات بـ incr()، والملخص JSON يتضمن نسبة إصابة
+    الذاكرة المؤقتة ومعدل الأحرف في الثانية. آمن للاستخدام من عدة خيوط.
+    """
+
+    def __init__(self, snapshot_file: Optional[str] = None, snapshot_interval: float = 30):
+        self.counters = Counter()
+        self.stages: Dict[str, LatencyHistogram] = {}
+        self.snapshot_file = snapshot_file
+        self.snapshot_interval = snapshot_interval
+        self.started = time.monotonic()
+        self.last_snapshot = self.started
+        # أقسام إضافية من مكونات أخرى (مثل إحصائيات الاتصالات) تُضاف كما هي إلى الملخص
+        self.sections: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+
+    def incr(self, name: str, amount: int = 1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def observe(self, stage: str, seconds: float):
+        with self.lock:
+            if stage not in self.stages:
+                self.stages[stage] = LatencyHistogram()
+            self.stages[stage].observe(seconds)
+
+    def attach(self, name: str, data: Dict):
+        with self.lock:
+            self.sections[name] = data
+
+    @contextmanager
+    def timer(self, stage: str):
+        """قياس زمن كتلة كود وإضافته إلى مدرج المرحلة"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def summary(self) -> Dict:
+        """ملخص المقاييس الحالية كقاموس قابل للتحويل إلى JSON"""
+        with self.lock:
+            elapsed = time.monotonic() - self.started
+            counters = dict(self.counters)
+            stages = {name: histogram.summary() for name, histogram in sorted(self.stages.items())}
+            sections = dict(self.sections)
+
+        lookups = counters.get('cache_hits', 0) + counters.get('cache_misses', 0)
+        return {
+            'elapsed_seconds': round(elapsed, 3),
+            'counters': counters,
+            'cache_hit_rate': round(counters.get('cache_hits', 0) / lookups, 4) if lookups else None,
+            'chars_per_second': round(counters.get('chars_translated', 0) / elapsed, 2) if elapsed else 0,
+            'requests_per_second': round(counters.get('requests', 0) / elapsed, 3) if elapsed else 0,
+            'stages': stages,
+            **sections
+        }
+
+    def write(self, path: str):
+        """حفظ الملخص في ملف JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+
+    def maybe_snapshot(self):
+        """إلحاق لقطة بملف اللقطات (JSONL) إذا مرت الفترة المحددة منذ آخر لقطة"""
+        if not self.snapshot_file:
+            return
+
+        now = time.monotonic()
+        if now - self.last_snapshot < self.snapshot_interval:
+            return
+        self.last_snapshot = now
+
+        snapshot = self.summary()
+        snapshot['timestamp'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        with open(self.snapshot_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(snapshot, ensure_ascii=False) + '\n')
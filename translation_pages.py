@@ -0,0 +1,31 @@
+import re
+from typing import Iterator, Optional, Tuple
+
+# علامة بداية الصفحة كما يكتبها PDFTextParser
+PAGE_HEADER = '=== الصفحة {} ==='
+PAGE_MARKER = re.compile(r'=== الصفحة (\d+) ===')
+
+
+def iter_pages(path: str) -> Iterator[Tuple[Optional[str], str]]:
+    """قراءة الملف سطراً بسطر وإرجاع (علامة الصفحة، نص الصفحة) عند كل علامة صفحة
+
+    العلامة تُعاد كما وردت في الملف (بأرقامها الهندية مثل ٢ إن وجدت) لتُكتب دون تغيير،
+    وسطرها لا يدخل في نص الصفحة. النص الذي يسبق أول علامة (إن وجد) يُعاد بعلامة
+    None. لا يُحتفظ في الذاكرة إلا بالصفحة الحالية.
+    """
+    header = None
+    lines = []
+
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            match = PAGE_MARKER.match(line)
+            if match:
+                if lines or header is not None:
+                    yield header, ''.join(lines)
+                header = match.group(0)
+                lines = [line[match.end():]]
+                continue
+            lines.append(line)
+
+    if lines or header is not None:
+        yield header, ''.join(lines)
@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+from translation_backends import NetworkSetupError, RateLimitError
+from translation_metrics import PipelineMetrics
+
+# مدة الانتظار عند رفض الخادم للطلب (429) دون تحديد Retry-After
+RATE_LIMIT_BACKOFF = 10
+
+
+class TokenBucket:
+    """دلو رموز غير متزامن: rate رمز في الثانية بسعة قصوى capacity"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1):
+        # الطلب الأكبر من السعة ينتظر امتلاء الدلو بالكامل فقط
+        amount = min(amount, self.capacity)
+        while True:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return
+            await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+class RateLimiter:
+    """تحديد معدل الطلبات (طلب/ثانية) والأحرف (حرف/دقيقة) مع احترام Retry-After"""
+
+    def __init__(self, requests_per_second: Optional[float] = None,
+                 chars_per_minute: Optional[float] = None):
+        self.requests = TokenBucket(requests_per_second, max(1.0, requests_per_second)) \
+            if requests_per_second else None
+        self.chars = TokenBucket(chars_per_minute / 60, chars_per_minute) \
+            if chars_per_minute else None
+        self.paused_until = 0.0
+
+    def pause(self, seconds: float):
+        """إيقاف جميع الطلبات مؤقتاً (مثلاً بعد استجابة 429)"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self, chars: int):
+        while True:
+            wait = self.paused_until - time.monotonic()
+            if wait <= 0:
+                break
+            await asyncio.sleep(wait)
+
+        if self.requests:
+            await self.requests.acquire(1)
+        if self.chars:
+            await self.chars.acquire(chars)
+
+
+class AdaptivePacer:
+    """تنظيم معدل الطلبات بأسلوب AIMD حسب استجابة الخادم
+
+    كل نجاح يرفع المعدل بمقدار ثابت (increase طلب/ثانية) حتى max_rate، وكل فشل
+    (429 أو خطأ خادم أو انتهاء مهلة) يضربه في decrease حتى min_rate، مع احترام
+    Retry-After. المترجمات بلا حد للمعدل (enabled=False) لا تنتظر إطلاقاً.
+    يعمل مع الخيوط (wait) ومع asyncio (reserve ثم asyncio.sleep).
+    """
+
+    def __init__(self, initial_rate: float = 0.4, min_rate: float = 1 / 60, max_rate: float = 2.0,
+                 increase: float = 0.05, decrease: float = 0.5, jitter: float = 0.2, enabled: bool = True):
+        self.rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.jitter = jitter
+        self.enabled = enabled
+        self.next_slot = 0.0
+        self.hold_until = 0.0
+        self.lock = threading.Lock()
+
+    @property
+    def interval(self) -> float:
+        return 1 / self.rate
+
+    def reserve(self) -> float:
+        """حجز موعد الطلب التالي وإرجاع المدة المتبقية حتى يحين"""
+        if not self.enabled:
+            return 0.0
+
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot, self.hold_until)
+            # تذبذب بسيط حتى لا تأتي الطلبات بإيقاع ثابت
+            self.next_slot = slot + self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+            return slot - now
+
+    def held(self) -> float:
+        """المدة المتبقية من إيقاف Retry-After (صفر إذا لم يكن هناك إيقاف)"""
+        if not self.enabled:
+            return 0.0
+        return max(0.0, self.hold_until - time.monotonic())
+
+    def wait(self) -> float:
+        """الانتظار (بشكل متزامن) حتى موعد الطلب التالي
+
+        إذا وصل إيقاف (429) أثناء الانتظار يُحجز موعد جديد بعده بدل الإرسال في موعد قديم.
+        """
+        total = 0.0
+        while True:
+            delay = self.reserve()
+            if delay > 0:
+                time.sleep(delay)
+            total += delay
+            if not self.held():
+                return total
+
+    async def wait_async(self) -> float:
+        """نسخة asyncio من wait"""
+        total = 0.0
+        while True:
+            delay = self.reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            total += delay
+            if not self.held():
+                return total
+
+    def success(self):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def failure(self, retry_after: Optional[float] = None):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            now = time.monotonic()
+            if retry_after:
+                self.hold_until = max(self.hold_until, now + retry_after)
+            # الطلب التالي ينتظر الفاصل الجديد كاملاً
+            self.next_slot = max(self.next_slot, now + self.interval)
+        logging.warning(f"تخفيض معدل الطلبات إلى {self.rate:.3f} طلب/ثانية")
+
+
+class AsyncTranslationEngine:
+    """محرك ترجمة غير متزامن يبقي عدداً محدوداً من الطلبات قيد التنفيذ"""
+
+    def __init__(self, translate: Callable[[str], str], concurrency: int = 4,
+                 requests_per_second: Optional[float] = None,
+                 chars_per_minute: Optional[float] = None, max_retries: int = 5,
+                 metrics: Optional[PipelineMetrics] = None, pacer: Optional[AdaptivePacer] = None):
+        self.translate_fn = translate
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.limiter = RateLimiter(requests_per_second, chars_per_minute)
+        self.max_retries = max_retries
+        self.metrics = metrics
+        self.pacer = pacer
+        self.requests = 0
+        self.failures = 0
+
+    async def translate(self, text: str, translate: Optional[Callable[[str], str]] = None) -> Optional[str]:
+        """ترجمة نص واحد مع إعادة المحاولة، يعيد None عند فشل جميع المحاولات
+
+        translate يحل محل دالة المحرك لهذا الطلب (مترجم لغة هدف أخرى مثلاً)
+        مع الاشتراك في نفس حد التزامن والمعدل.
+        """
+        last_error = None
+        translate = translate or self.translate_fn
+
+        for attempt in range(self.max_retries):
+            start = time.perf_counter()
+            if self.pacer:
+                await self.pacer.wait_async()
+            await self.limiter.acquire(len(text))
+            if self.metrics:
+                self.metrics.observe('rate_limit_wait', time.perf_counter() - start)
+            try:
+                async with self.semaphore:
+                    # رد 429 قد يصل أثناء انتظار دور التزامن، فلا يُرسل الطلب قبل انتهاء الإيقاف
+                    if self.pacer and self.pacer.held():
+                        await self.pacer.wait_async()
+                    self.requests += 1
+                    result = await asyncio.to_thread(translate, text)
+
+                if result and isinstance(result, str):
+                    if self.pacer:
+                        self.pacer.success()
+                    return result
+
+            except NetworkSetupError:
+                raise
+
+            except RateLimitError as e:
+                last_error = str(e)
+                wait = e.retry_after or RATE_LIMIT_BACKOFF
+                logging.warning(f"تجاوز حد الطلبات، إيقاف الإرسال لمدة {wait} ثانية")
+                if self.metrics:
+                    self.metrics.incr('rate_limited')
+                if self.pacer:
+                    self.pacer.failure(wait)
+                else:
+                    self.limiter.pause(wait)
+
+            except Exception as e:
+                last_error = str(e)
+                logging.warning(f"فشل المحاولة {attempt + 1}: {last_error}")
+                if self.metrics:
+                    self.metrics.incr('request_errors')
+                if self.pacer:
+                    # التراجع يحدده المنظم: المحاولة التالية تنتظر فاصله الجديد
+                    self.pacer.failure()
+                else:
+                    # تأخير تصاعدي بين المحاولات دون حجز مكان في الطابور
+                    await asyncio.sleep((attempt + 1) * 2)
+
+        self.failures += 1
+        if self.metrics:
+            self.metrics.incr('failed_translations')
+        logging.error(f"فشلت جميع محاولات الترجمة. آخر خطأ: {last_error}")
+        return None